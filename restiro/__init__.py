@@ -2,7 +2,7 @@ from .models import (
     Resources, Resource, ResourceExample, ExampleRequest, ExampleResponse,
     DocumentationRoot, Document,
     Param, URLParam, QueryParam, HeaderParam, FormParam,
-    BodyFormat, BodyFormatJson, BodyFormatYaml, BodyFormatXml
+    BodyFormat, BodyFormatJson, BodyFormatYaml, BodyFormatXml, ExamplePolicy
 )
 from .parser import Parser
 from .documentor import Documentor
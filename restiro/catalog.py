@@ -0,0 +1,463 @@
+import re
+import struct
+import gettext
+import hashlib
+
+from os import replace, scandir
+from os.path import join, exists, relpath, dirname
+from typing import Iterable, List
+
+from restiro.models.translation_mixin import TranslationMixin
+
+_escapes = {
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\t': '\\t',
+    '\r': '\\r'
+}
+_unescapes = {value[1]: key for key, value in _escapes.items()}
+_escape_regex = re.compile(r'[\\"\n\t\r]')
+_unescape_regex = re.compile(r'\\(.)')
+_line_regex = re.compile(r'[^\n]*\n|[^\n]+')
+_keyword_regex = re.compile(
+    r'(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)\s+(".*")$')
+
+# Header of compiled catalogs, digest of their `.po` source
+source_digest_header = 'X-Restiro-Source-Digest'
+
+default_headers = (
+    ('MIME-Version', '1.0'),
+    ('Content-Type', 'text/plain; charset=UTF-8'),
+    ('Content-Transfer-Encoding', '8bit'),
+)
+
+
+def escape(string: str) -> str:
+    return _escape_regex.sub(lambda m: _escapes[m.group()], string)
+
+
+def unescape(string: str) -> str:
+    return _unescape_regex.sub(
+        lambda m: _unescapes.get(m.group(1), m.group(1)), string)
+
+
+def format_string(keyword: str, value: str, prefix: str = '') -> str:
+    """ Format a PO keyword, strings with new lines are split per line """
+    lines = _line_regex.findall(value)
+    if len(lines) < 2:
+        return '%s%s "%s"' % (prefix, keyword, escape(value))
+
+    return '\n'.join(
+        ['%s%s ""' % (prefix, keyword)] +
+        ['%s"%s"' % (prefix, escape(line)) for line in lines]
+    )
+
+
+class CatalogEntry:
+    """
+    A message of a catalog, ``msgctxt`` and plural forms are kept as read
+    from ``.po`` files of other tools.
+    """
+
+    def __init__(self, msgid: str, msgstr: str = '',
+                 references: List[str] = None, flags: List[str] = None,
+                 comments: List[str] = None, obsolete: bool = False,
+                 msgctxt: str = None, msgid_plural: str = None,
+                 msgstr_plural: List[str] = None):
+        self.msgid = msgid
+        self.msgstr = msgstr
+        self.references = references if references else []
+        self.flags = flags if flags else []
+        self.comments = comments if comments else []
+        self.obsolete = obsolete
+        self.msgctxt = msgctxt
+        self.msgid_plural = msgid_plural
+        self.msgstr_plural = msgstr_plural if msgstr_plural else []
+
+    @property
+    def key(self) -> str:
+        """ Key of the entry in catalogs, like in ``.mo`` files """
+        if self.msgctxt is None:
+            return self.msgid
+        return '%s\x04%s' % (self.msgctxt, self.msgid)
+
+    @property
+    def fuzzy(self):
+        return 'fuzzy' in self.flags
+
+    @property
+    def translated(self) -> bool:
+        if self.msgid_plural is None:
+            return bool(self.msgstr)
+        return bool(self.msgstr_plural) and all(self.msgstr_plural)
+
+    def __str__(self):
+        lines = ['# %s' % comment for comment in self.comments]
+        lines.extend('#: %s' % reference for reference in self.references)
+        if self.flags:
+            lines.append('#, %s' % ', '.join(self.flags))
+
+        prefix = '#~ ' if self.obsolete else ''
+        if self.msgctxt is not None:
+            lines.append(format_string('msgctxt', self.msgctxt, prefix))
+        lines.append(format_string('msgid', self.msgid, prefix))
+        if self.msgid_plural is None:
+            lines.append(format_string('msgstr', self.msgstr, prefix))
+        else:
+            lines.append(
+                format_string('msgid_plural', self.msgid_plural, prefix))
+            lines.extend(
+                format_string('msgstr[%d]' % index, msgstr, prefix)
+                for index, msgstr in enumerate(self.msgstr_plural)
+            )
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return '<CatalogEntry %r>' % self.msgid
+
+
+class Catalog:
+    """
+    Gettext message catalog, reads and writes ``.po``/``.pot`` files and
+    compiles them into ``.mo`` files.
+
+    Entries are kept by ``msgid`` (and ``msgctxt``, see
+    :attr:`CatalogEntry.key`), so each message is emitted once with all its
+    source references.
+    """
+
+    def __init__(self, headers: Iterable = default_headers):
+        self.headers = list(headers)
+        self.entries = {}
+
+    def add(self, msgid: str, reference: str = None):
+        if not msgid:
+            # The empty msgid is reserved for the header
+            return None
+
+        entry = self.entries.get(msgid)
+        if entry is None:
+            entry = self.entries[msgid] = CatalogEntry(msgid)
+
+        if reference is not None and reference not in entry.references:
+            entry.references.append(reference)
+        return entry
+
+    def __contains__(self, msgid):
+        return msgid in self.entries
+
+    def __getitem__(self, msgid) -> CatalogEntry:
+        return self.entries[msgid]
+
+    def __iter__(self):
+        return iter(sorted(
+            self.entries.values(),
+            key=lambda entry: (entry.obsolete, entry.msgid, entry.key)
+        ))
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def from_docs_root(cls, docs_root, base_dir: str = None) -> 'Catalog':
+        """
+        Collect translatable strings of a documentation tree, resources are
+        referenced by their docstring location.
+
+        :param docs_root: A :class:`restiro.models.DocumentationRoot`
+        :param base_dir: References are relative to this directory
+        """
+        catalog = cls(headers=[
+            ('Project-Id-Version', docs_root.title)
+        ] + list(default_headers))
+
+        # Only the root's own strings, its children are added below
+        for msgid in TranslationMixin.extract_translations(docs_root):
+            catalog.add(msgid)
+
+        for msgid in docs_root.documents.extract_translations():
+            catalog.add(msgid)
+
+        for resource in docs_root.resources.values():
+            reference = None
+            if resource.filename is not None:
+                filename = resource.filename
+                if base_dir is not None:
+                    filename = relpath(filename, base_dir)
+                reference = '%s:%s' % (filename, resource.start_line)
+
+            for msgid in resource.extract_translations():
+                catalog.add(msgid, reference)
+
+        for entry in catalog.entries.values():
+            entry.references.sort(key=_reference_key)
+        return catalog
+
+    @property
+    def header(self) -> str:
+        return ''.join('%s: %s\n' % header for header in self.headers)
+
+    def to_po(self) -> str:
+        entries = [str(CatalogEntry('', self.header))]
+        entries.extend(str(entry) for entry in self)
+        return '\n\n'.join(entries) + '\n'
+
+    def save(self, filename: str):
+        temp_filename = '%s.tmp' % filename
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            f.write(self.to_po())
+        replace(temp_filename, filename)
+
+    @classmethod
+    def parse(cls, source: str) -> 'Catalog':
+        """ Parse a ``.po`` source """
+        catalog = cls(headers=())
+        entry = {}
+        keyword = None
+
+        def flush():
+            if 'msgid' in entry:
+                msgid = entry.pop('msgid')
+                msgstr = entry.pop('msgstr', '')
+                plural_forms = entry.pop('plural_forms', {})
+                if msgid or 'msgctxt' in entry:
+                    result = CatalogEntry(msgid, msgstr, **entry)
+                    result.msgstr_plural = [
+                        plural_forms[index] for index in sorted(plural_forms)
+                    ]
+                    catalog.entries[result.key] = result
+                else:
+                    catalog.headers = [
+                        tuple(line.split(': ', 1)) if ': ' in line else
+                        (line.rstrip(':'), '')
+                        for line in msgstr.splitlines()
+                    ]
+            entry.clear()
+
+        for line_number, line in enumerate(source.splitlines(), start=1):
+            line = line.strip()
+            obsolete = line.startswith('#~')
+            if obsolete:
+                line = line[2:].strip()
+
+            if not line:
+                flush()
+                keyword = None
+                continue
+
+            if line.startswith('#'):
+                if 'msgid' in entry:
+                    flush()
+                if line.startswith('#:'):
+                    entry.setdefault('references', []).extend(
+                        line[2:].split())
+                elif line.startswith('#,'):
+                    entry.setdefault('flags', []).extend(
+                        flag.strip() for flag in line[2:].split(','))
+                elif line.startswith('# ') or line == '#':
+                    entry.setdefault('comments', []).append(line[2:])
+                continue
+
+            match = _keyword_regex.match(line)
+            if match:
+                keyword, plural_index, string = match.groups()
+                if keyword in ('msgctxt', 'msgid') and 'msgid' in entry:
+                    flush()
+                if plural_index is not None:
+                    keyword = int(plural_index)
+                    entry.setdefault('plural_forms', {})[keyword] = \
+                        unescape(string[1:-1])
+                else:
+                    entry[keyword] = unescape(string[1:-1])
+                if obsolete:
+                    entry['obsolete'] = True
+
+            elif line.startswith('"') and line.endswith('"') and \
+                    keyword is not None:
+                if isinstance(keyword, int):
+                    entry['plural_forms'][keyword] += unescape(line[1:-1])
+                else:
+                    entry[keyword] += unescape(line[1:-1])
+
+            else:
+                raise ValueError('Invalid catalog line %d: %s' % (
+                    line_number, line))
+
+        flush()
+        return catalog
+
+    @classmethod
+    def load(cls, filename: str) -> 'Catalog':
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls.parse(f.read())
+
+    def merge(self, template: 'Catalog') -> 'Catalog':
+        """
+        Update translations of this catalog with a template, like
+        ``msgmerge``. Messages keep their translations, new messages are
+        added and messages missing in the template become obsolete.
+        """
+        result = Catalog(headers=self.headers or template.headers)
+        for key, entry in template.entries.items():
+            existing = self.entries.get(key)
+            result.entries[key] = CatalogEntry(
+                entry.msgid,
+                existing.msgstr if existing else '',
+                references=list(entry.references),
+                flags=list(existing.flags) if existing else [],
+                comments=list(existing.comments) if existing else [],
+                msgctxt=entry.msgctxt,
+                msgid_plural=entry.msgid_plural,
+                msgstr_plural=list(existing.msgstr_plural) if existing else []
+            )
+
+        for key, entry in self.entries.items():
+            if key not in result.entries and entry.translated:
+                result.entries[key] = CatalogEntry(
+                    entry.msgid,
+                    entry.msgstr,
+                    flags=list(entry.flags),
+                    comments=list(entry.comments),
+                    obsolete=True,
+                    msgctxt=entry.msgctxt,
+                    msgid_plural=entry.msgid_plural,
+                    msgstr_plural=list(entry.msgstr_plural)
+                )
+        return result
+
+    def to_mo(self, extra_headers: Iterable = ()) -> bytes:
+        """ Compile into the GNU ``.mo`` format, like ``msgfmt`` """
+        messages = {}
+        for key, entry in self.entries.items():
+            if not entry.translated or entry.fuzzy or entry.obsolete or \
+                    not key:
+                continue
+
+            if entry.msgid_plural is None:
+                messages[key.encode()] = entry.msgstr.encode()
+            else:
+                messages[
+                    ('%s\0%s' % (key, entry.msgid_plural)).encode()
+                ] = '\0'.join(entry.msgstr_plural).encode()
+
+        headers = list(self.headers or default_headers) + list(extra_headers)
+        if not any(name == 'Content-Type' for name, _ in headers):
+            headers.append(default_headers[1])
+        messages[b''] = ''.join(
+            '%s: %s\n' % header for header in headers).encode()
+
+        keys = sorted(messages)
+        ids = strs = b''
+        offsets = []
+        for key in keys:
+            offsets.append((len(ids), len(key), len(strs), len(messages[key])))
+            ids += key + b'\0'
+            strs += messages[key] + b'\0'
+
+        keys_start = 7 * 4 + 16 * len(keys)
+        values_start = keys_start + len(ids)
+        key_offsets = []
+        value_offsets = []
+        for id_offset, id_length, str_offset, str_length in offsets:
+            key_offsets += [id_length, id_offset + keys_start]
+            value_offsets += [str_length, str_offset + values_start]
+
+        return struct.pack(
+            '<7I',
+            0x950412de,  # Magic
+            0,  # Version
+            len(keys),
+            7 * 4,  # Start of key index
+            7 * 4 + len(keys) * 8,  # Start of value index
+            0, 0  # Size and offset of hash table
+        ) + struct.pack(
+            '<%dI' % (len(keys) * 4), *(key_offsets + value_offsets)
+        ) + ids + strs
+
+
+def update_po(po_filename: str, template: Catalog, locale: str = None):
+    """
+    Create or update the ``.po`` file of a locale from a template
+
+    :return: The merged catalog
+    """
+    if exists(po_filename):
+        catalog = Catalog.load(po_filename).merge(template)
+    else:
+        catalog = Catalog(headers=template.headers + (
+            [('Language', locale)] if locale else []
+        )).merge(template)
+
+    if not exists(po_filename) or catalog.to_po() != _read_text(po_filename):
+        catalog.save(po_filename)
+    return catalog
+
+
+def compile_mo(po_filename: str, mo_filename: str = None) -> bool:
+    """
+    Compile a ``.po`` file, it's skipped when the ``.po`` content did not
+    change since the last compile. The digest of the compiled source is kept
+    in a header of the ``.mo`` file.
+
+    :return: Whether the ``.mo`` file was (re)compiled
+    """
+    mo_filename = mo_filename or '%s.mo' % po_filename[:-len('.po')]
+    with open(po_filename, 'rb') as f:
+        source = f.read()
+
+    digest = hashlib.sha1(source).hexdigest()
+    if exists(mo_filename) and _read_source_digest(mo_filename) == digest:
+        return False
+
+    catalog = Catalog.parse(source.decode('utf-8'))
+    temp_filename = '%s.tmp' % mo_filename
+    with open(temp_filename, 'wb') as f:
+        f.write(catalog.to_mo(extra_headers=[
+            (source_digest_header, digest)
+        ]))
+    replace(temp_filename, mo_filename)
+    return True
+
+
+def compile_locales(locales_dir: str, locales: Iterable[str] = None,
+                    domain: str = 'restiro') -> List[str]:
+    """
+    Compile ``{locale}/LC_MESSAGES/{domain}.po`` files of locales
+
+    :param locales_dir:
+    :param locales: Defaults to all sub directories
+    :param domain:
+    :return: Compiled ``.mo`` files
+    """
+    if locales is None:
+        locales = [entry.name for entry in scandir(locales_dir)
+                   if entry.is_dir()]
+
+    compiled = []
+    for locale in locales:
+        po_filename = join(
+            locales_dir, locale, 'LC_MESSAGES', '%s.po' % domain)
+        if exists(po_filename) and compile_mo(po_filename):
+            compiled.append(join(dirname(po_filename), '%s.mo' % domain))
+    return compiled
+
+
+def _read_source_digest(mo_filename: str):
+    try:
+        with open(mo_filename, 'rb') as f:
+            info = gettext.GNUTranslations(f).info()
+    except (OSError, ValueError, LookupError, struct.error):
+        # Not compiled by us
+        return None
+    return info.get(source_digest_header.lower())
+
+
+def _reference_key(reference: str):
+    filename, _, line = reference.rpartition(':')
+    return filename, int(line) if line.isdigit() else 0
+
+
+def _read_text(filename: str) -> str:
+    with open(filename, 'r', encoding='utf-8') as f:
+        return f.read()
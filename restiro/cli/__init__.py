@@ -4,7 +4,7 @@ from importlib.util import find_spec
 from os import scandir, makedirs
 from os.path import dirname, isdir, basename, join
 
-from restiro import Documentor
+from restiro import Documentor, ExamplePolicy
 from restiro.helpers import validate_locale_name
 
 parser = argparse.ArgumentParser(description='Restiro Builder')
@@ -17,13 +17,41 @@ parser.add_argument(
 parser.add_argument(
     '-b', '--base-uri', help='Base URI')
 parser.add_argument(
-    '-g', '--generator', choices=('markdown', 'json', 'spa_material'),
+    '-g', '--generator',
+    choices=('markdown', 'json', 'json_sharded', 'spa_material'),
     default='markdown', help='Generator, default: markdown')
 parser.add_argument(
     '-l', '--locales', default='./locales', help='Locales directory')
 parser.add_argument(
     '--build-gettext', default=False, const=True, nargs='?',
-    help='Build .POT templates')
+    help='Build .POT templates and update .PO catalogs of locales')
+parser.add_argument(
+    '--cache-file', help='Parse cache file, speeds up rebuilds')
+parser.add_argument(
+    '-j', '--jobs', type=int, help='Number of processes to scan sources with')
+parser.add_argument(
+    '--extractor', choices=('regex', 'tokenize'), default='regex',
+    help='Docstring extraction engine, default: regex')
+parser.add_argument(
+    '--locale-jobs', type=int,
+    help='Number of processes to render locales with')
+parser.add_argument(
+    '--render-jobs', type=int,
+    help='Number of processes to render resources with')
+parser.add_argument(
+    '--incremental', action='store_true',
+    help='Rewrite changed files only, keeps the output directory')
+parser.add_argument(
+    '--max-examples', type=int, help='Maximum number of examples per resource')
+parser.add_argument(
+    '--max-examples-per-status', type=int,
+    help='Maximum number of examples per resource and status code')
+parser.add_argument(
+    '--dedupe-examples', action='store_true',
+    help='Skip examples of the same request')
+parser.add_argument(
+    '--max-body-size', type=int,
+    help='Truncate example bodies larger than this number of bytes')
 
 
 def main():
@@ -33,38 +61,67 @@ def main():
     locales_dir = args.locales
     output_base_dir = args.output
 
+    example_policy = None
+    if args.max_examples is not None or \
+            args.max_examples_per_status is not None or \
+            args.dedupe_examples or args.max_body_size is not None:
+        example_policy = ExamplePolicy(
+            max_per_resource=args.max_examples,
+            max_per_status=args.max_examples_per_status,
+            dedupe=args.dedupe_examples,
+            max_body_size=args.max_body_size
+        )
+
     def get_documentor():
         return Documentor(
             title=title,
             base_uri=args.base_uri,
             source_dir=source_dir,
-            generator_type=args.generator
+            generator_type=args.generator,
+            cache_file=args.cache_file,
+            jobs=args.jobs,
+            extractor=args.extractor,
+            incremental=args.incremental,
+            render_jobs=args.render_jobs,
+            example_policy=example_policy
         )
 
+    def get_locales():
+        return [
+            basename(entry.path)
+            for entry in scandir(locales_dir)
+            if entry.is_dir() and validate_locale_name(basename(entry.path))
+        ]
+
     if args.build_gettext:
         gettext_dir = join(locales_dir, 'gettext')
         makedirs(gettext_dir, exist_ok=True)
 
-        get_documentor().generate_gettext(gettext_dir)
+        locales = get_locales()
+        get_documentor().generate_gettext(gettext_dir, locales_dir, locales)
         print('gettext .POT templates generated in: %s' % gettext_dir)
+        for locale in locales:
+            print('gettext .PO catalog updated: %s' % locale)
         return
 
     if isdir(locales_dir):
-        for entry in scandir(locales_dir):
-            if not entry.is_dir():
-                continue
-
-            locale = basename(entry.path)
-
-            if not validate_locale_name(locale):
-                continue
-
-            output_dir = join(output_base_dir, locale)
-            makedirs(output_dir, exist_ok=True)
-            get_documentor().generate(output_dir, locales_dir, locale)
-
+        locales = get_locales()
+        documentor = get_documentor()
+        output_dirs = documentor.generate_locales(
+            output_base_dir,
+            locales_dir,
+            locales,
+            processes=args.locale_jobs
+        )
+        for output_dir in output_dirs:
             print('Documentation build success. (%s)' % output_dir)
+        for locale, (hits, misses) in documentor.translation_stats.items():
+            print('Translations of %s: %d lookups, %d memoized' % (
+                locale, hits + misses, hits))
 
     else:
-        get_documentor().generate(output_base_dir)
+        summary = get_documentor().generate(output_base_dir)
+        if summary is not None:
+            for filename in summary.changed:
+                print('Changed: %s' % filename)
         print('Documentation build success. (%s)' % output_base_dir)
@@ -1,7 +1,19 @@
 import re
 
 docstring_block_regex = re.compile(r'\"\"\"([\s\S]*?)\"\"\"')
+api_string_prefix_regex = re.compile(r'[rRuU]?(\"\"\"|\'\'\')\s*@api')
 within_parentheses_regex = re.compile(r'\(([\s\S]*?)\)')
 within_brackets_regex = re.compile(r'{([\s\S]*?)}')
 single_word_regex = re.compile(r'\s(\[?\w+\]?)(?=\s?)')
 path_regex = re.compile(r'\s/([/\w:]+)(?=\s?)')
+
+# Directive name of a docstring line, e.g. `@apiParam`
+directive_regex = re.compile(r'(@\w+) ')
+# Whole `@api {method} /path title` line in one pass
+api_line_regex = re.compile(
+    r'@\w+\s+{(?P<type>[^{}\s]*)}\s(?P<path>/[/\w:]+)(?P<title>[\s\S]*)')
+# Whole `@apiParam (group) {type} name description` line in one pass, lines
+# out of this shape are parsed piece by piece
+param_line_regex = re.compile(
+    r'@\w+(?:\s+\((?P<group>[^(){}\s]*)\))?(?:\s+{(?P<type>[^(){}\s]*)})?'
+    r'\s(?P<name>\[?\w+\]?)(?=\s|$)(?P<description>[^({]*)')
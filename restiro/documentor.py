@@ -1,31 +1,52 @@
-from typing import Type
+import pickle
 
+from typing import Type, Iterable
+from uuid import uuid4
+
+from os import makedirs
 from os.path import join
 from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor
 
-from restiro import Parser, DocumentationRoot
-from restiro.helpers import generate_pot
+from restiro import Parser, DocumentationRoot, ExamplePolicy
+from restiro.catalog import Catalog, update_po, compile_locales
 from restiro.generators import BaseGenerator
 
+builtin_generators = ('json', 'json_sharded', 'markdown')
+
 
 class Documentor:
 
     def __init__(self, title: str, source_dir: str, base_uri: str=None,
-                 generator_type: str='markdown'):
+                 generator_type: str='markdown', cache_file: str=None,
+                 jobs: int=None, extractor: str='regex',
+                 incremental: bool=False, render_jobs: int=None,
+                 example_policy: ExamplePolicy=None):
         self.title = title
         self.source_dir = source_dir
         self.base_uri = base_uri
         self.generator_type = generator_type
+        self.cache_file = cache_file
+        self.jobs = jobs
+        self.extractor = extractor
+        self.incremental = incremental
+        self.render_jobs = render_jobs
+        self.example_policy = example_policy
+        # `(hits, misses)` of translations by locale, of the last build
+        self.translation_stats = {}
 
     def initiate_docs_root(self, locale=None):
-        parsed_resources = Parser.load_from_path(self.source_dir)
+        parsed_resources = Parser.load_from_path(self.source_dir,
+                                                  cache_file=self.cache_file,
+                                                  jobs=self.jobs,
+                                                  extractor=self.extractor)
         docs_root = DocumentationRoot(
             title=self.title,
             base_uri=self.base_uri,
             locale=locale
         )
         docs_root.resources.update(parsed_resources)
-        docs_root.load_resource_examples()
+        docs_root.load_resource_examples(policy=self.example_policy)
         return docs_root
 
     @property
@@ -33,31 +54,134 @@ class Documentor:
         try:
             module_name = (
                 'restiro.generators.%s' % self.generator_type
-                if self.generator_type in ('json', 'markdown') else
+                if self.generator_type in builtin_generators else
                 'restiro_%s' % self.generator_type
             )
             mod = import_module(module_name)
-            for cname in dir(mod):
-                if not cname.endswith('Generator') or cname == 'BaseGenerator':
-                    continue
-
-                return getattr(mod, cname)
-
         except ImportError:
             raise ValueError('Generator not detected %s' % self.generator_type)
 
+        # Generators defined in the module come first, then the ones it
+        # re-exports (e.g. from a submodule of a plugin package), restiro's
+        # own generators are only taken from their modules
+        defined, exported = [], []
+        for cname in dir(mod):
+            generator = getattr(mod, cname)
+            if not cname.endswith('Generator') or \
+                    not isinstance(generator, type) or \
+                    not issubclass(generator, BaseGenerator):
+                continue
+            if generator.__module__ == mod.__name__:
+                defined.append(generator)
+            elif not generator.__module__.startswith('restiro.'):
+                exported.append(generator)
+
+        if defined or exported:
+            return (defined + exported)[0]
+
+        raise ValueError('Generator not detected %s' % self.generator_type)
+
     def generate(self, output_dir: str, locales_dir=None, locale=None):
         docs_root = self.initiate_docs_root(locale)
+        self.translation_stats = {}
         if locale:
-            docs_root.translate_all(locales_dir, locale)
+            compile_locales(locales_dir, [locale])
+            translator = docs_root.translate_all(locales_dir, locale)
+            self.translation_stats[locale] = \
+                translator.hits, translator.misses
 
-        self.generator(
+        return self.generator(
             docs_root=docs_root,
-            destination_dir=output_dir
+            destination_dir=output_dir,
+            incremental=self.incremental,
+            processes=self.render_jobs
+        ).generate()
+
+    def generate_locale(self, docs_root: DocumentationRoot, output_dir: str,
+                        locales_dir: str, locale: str):
+        """ Generate a translated view of an initiated docs root """
+        translator = docs_root.get_translator(locales_dir, locale)
+        localized_docs_root = docs_root.translated(translator)
+        localized_docs_root.locale = locale
+        self.translation_stats[locale] = translator.hits, translator.misses
+
+        makedirs(output_dir, exist_ok=True)
+        self.generator(
+            docs_root=localized_docs_root,
+            destination_dir=output_dir,
+            incremental=self.incremental,
+            processes=self.render_jobs
         ).generate()
+        return output_dir
+
+    def generate_locales(self, output_base_dir: str, locales_dir: str,
+                         locales: Iterable[str], processes: int = None):
+        """
+        Generate documentation of many locales, sources are parsed and
+        examples are loaded only once.
 
-    def generate_gettext(self, gettext_dir):
+        :param output_base_dir: Each locale is generated in a sub directory
+        :param locales_dir:
+        :param locales:
+        :param processes: Number of worker processes to render locales in
+        :return: Output directories, in order of ``locales``, see
+                 :attr:`translation_stats` for translation lookups
+        """
         docs_root = self.initiate_docs_root()
-        pot_file = join(gettext_dir, 'restiro.pot')
-        with open(pot_file, 'w+') as f:
-            f.write(generate_pot(docs_root.extract_translations()))
+        self.translation_stats = {}
+        locales = list(locales)
+        compile_locales(locales_dir, locales)
+        jobs = [
+            (join(output_base_dir, locale), locales_dir, locale)
+            for locale in locales
+        ]
+
+        if processes is None or processes < 2:
+            return [self.generate_locale(docs_root, *job) for job in jobs]
+
+        # Workers unpickle the docs root once per process, the
+        # ``initializer`` of ``ProcessPoolExecutor`` needs Python 3.7
+        state = uuid4().hex, pickle.dumps((self, docs_root))
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(
+                _generate_locale, [(state, job) for job in jobs]))
+
+        for locale, (_, stats) in zip(locales, results):
+            self.translation_stats[locale] = stats
+        return [output_dir for output_dir, _ in results]
+
+    def generate_gettext(self, gettext_dir, locales_dir=None,
+                         locales: Iterable[str] = ()):
+        """
+        Write the ``restiro.pot`` template, and create or update ``.po``
+        files of locales from it.
+
+        :param gettext_dir: Directory of the template
+        :param locales_dir:
+        :param locales: Locales to update ``{locale}/LC_MESSAGES/restiro.po``
+        :return: The template catalog
+        """
+        docs_root = self.initiate_docs_root()
+        template = Catalog.from_docs_root(docs_root, base_dir=self.source_dir)
+        template.save(join(gettext_dir, 'restiro.pot'))
+
+        for locale in locales:
+            messages_dir = join(locales_dir, locale, 'LC_MESSAGES')
+            makedirs(messages_dir, exist_ok=True)
+            update_po(join(messages_dir, 'restiro.po'), template, locale)
+
+        return template
+
+
+_locale_worker = None
+
+
+def _generate_locale(task):
+    global _locale_worker
+    (token, payload), job = task
+    if _locale_worker is None or _locale_worker[0] != token:
+        _locale_worker = (token, ) + pickle.loads(payload)
+
+    _, documentor, docs_root = _locale_worker
+    output_dir = documentor.generate_locale(docs_root, *job)
+    return output_dir, documentor.translation_stats[job[2]]
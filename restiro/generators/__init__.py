@@ -1,3 +1,4 @@
 from .base import BaseGenerator
 from .markdown import MarkdownGenerator
 from .json import JSONGenerator
+from .json_sharded import ShardedJSONGenerator
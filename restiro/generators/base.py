@@ -1,40 +1,207 @@
+import io
+import json
+import pickle
 import shutil
+import hashlib
 
-from os import makedirs
+from uuid import uuid4
+from itertools import chain
+
+from concurrent.futures import ProcessPoolExecutor
+
+from os import makedirs, remove, replace
 from os.path import exists, dirname, join
 
 from restiro import DocumentationRoot, Resource, Document
 
 
+class OutputFile(io.StringIO):
+    """
+    Output file rendered in memory, its content is handed to the generator
+    on close, so each rendered item is written at once.
+    """
+
+    def __init__(self, generator: 'BaseGenerator', filename: str):
+        super().__init__()
+        self.generator = generator
+        self.filename = filename
+
+    def close(self):
+        if not self.closed:
+            self.generator.write_output(self.filename, self.getvalue())
+        super().close()
+
+
+class StreamOutputFile:
+    """
+    Output file written through to disk as it's rendered, for outputs too
+    large to keep in memory. Its content is hashed on the fly for
+    incremental builds.
+    """
+
+    def __init__(self, generator: 'BaseGenerator', filename: str, path: str,
+                 mode: str = 'w'):
+        self.generator = generator
+        self.filename = filename
+        self.path = path
+        self.hash = hashlib.sha1()
+        self._file = open(path, mode)
+
+    def write(self, s: str):
+        self.hash.update(s.encode())
+        return self._file.write(s)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            self.generator.commit_stream(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class GenerateSummary:
+    """ Files touched by a build, relative to the destination directory """
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.unchanged = []
+
+    @property
+    def changed(self):
+        return sorted(self.created + self.updated + self.deleted)
+
+    def __repr__(self):
+        return '<GenerateSummary %d created, %d updated, %d deleted, ' \
+               '%d unchanged>' % (len(self.created), len(self.updated),
+                                  len(self.deleted), len(self.unchanged))
+
+
 # noinspection PyMethodMayBeStatic
 class BaseGenerator:
-    _files = []
+    manifest_filename = '.restiro-manifest.json'
 
-    def __init__(self, docs_root: DocumentationRoot, destination_dir: str):
+    def __init__(self, docs_root: DocumentationRoot, destination_dir: str,
+                 incremental: bool = False, processes: int = None):
+        """
+        :param docs_root:
+        :param destination_dir:
+        :param incremental: Keep the destination, rewrite changed files and
+                            delete files of removed items only, by the
+                            content hashes of the previous build.
+        :param processes: Number of worker processes to render resources
+                          with, files are written in the same order as a
+                          serial build.
+        """
         self.destination_dir = destination_dir
         self.docs_root = docs_root
+        self.incremental = incremental
+        self.processes = processes
+        # Written files and created directories of this build
+        self._files = set()
+        self._directories = set()
+        # Contents of an incremental build by filename
+        self._outputs = {}
+        # Streamed files of an incremental build, `(temp_path, digest)`
+        self._streams = {}
+
+    def _ensure_file(self, filename: str) -> OutputFile:
+        return OutputFile(self, filename)
+
+    def _ensure_stream(self, filename: str) -> StreamOutputFile:
+        """
+        Open an output file that is written through to disk, an incremental
+        build writes it once.
+        """
+        path = join(self.destination_dir, filename)
+        self._ensure_directory(dirname(path))
+        if self.incremental:
+            return StreamOutputFile(self, filename, '%s.tmp' % path)
+
+        if path in self._files:
+            return StreamOutputFile(self, filename, path, 'a')
+
+        self._files.add(path)
+        return StreamOutputFile(self, filename, path)
 
-    def _ensure_file(self, filename: str):
-        filename = join(self.destination_dir, filename)
-        d = dirname(filename)
-        if not exists(d):
-            makedirs(d)
+    def commit_stream(self, stream: StreamOutputFile):
+        if self.incremental:
+            self._streams[stream.filename] = \
+                stream.path, stream.hash.hexdigest()
 
-        if filename in self._files:
-            return open(filename, 'a')
+    def _ensure_directory(self, directory: str):
+        if directory not in self._directories:
+            makedirs(directory, exist_ok=True)
+            self._directories.add(directory)
+
+    def write_output(self, filename: str, content: str):
+        """
+        Write content of an output file, a file written more than once in a
+        build is appended to.
+        """
+        if self.incremental:
+            self._outputs.setdefault(filename, []).append(content)
+            return
+
+        path = join(self.destination_dir, filename)
+        self._ensure_directory(dirname(path))
+        if path in self._files:
+            mode = 'a'
         else:
-            f = open(filename, 'w')
-            self._files.append(filename)
-            return f
+            mode = 'w'
+            self._files.add(path)
 
-    def generate_resources(self):
+        with open(path, mode) as f:
+            f.write(content)
+
+    def iter_resources(self):
+        """ Resources in order of generation """
         resources_tree = self.docs_root.resources.__tree__.items()
         for resource_path, resource_methods in resources_tree:
             for resource_method, resources in resource_methods.items():
-                for resource in resources:
-                    f = self._ensure_file(self.get_resource_filename(resource))
-                    self.write_resource(f, resource)
-                    f.close()
+                yield from resources
+
+    def render_resource(self, resource: Resource) -> str:
+        f = io.StringIO()
+        self.write_resource(f, resource)
+        return f.getvalue()
+
+    def generate_resources(self):
+        if self.processes is not None and self.processes > 1:
+            self.generate_resources_parallel()
+            return
+
+        for resource in self.iter_resources():
+            f = self._ensure_file(self.get_resource_filename(resource))
+            self.write_resource(f, resource)
+            f.close()
+
+    def generate_resources_parallel(self):
+        resources = list(self.iter_resources())
+        chunk_size = max(1, len(resources) // (self.processes * 4))
+        # Workers unpickle the tree once per process and render resources
+        # by index, the ``initializer`` of ``ProcessPoolExecutor`` needs
+        # Python 3.7
+        state = uuid4().hex, pickle.dumps(self)
+        chunks = [
+            (state, range(start, min(start + chunk_size, len(resources))))
+            for start in range(0, len(resources), chunk_size)
+        ]
+        with ProcessPoolExecutor(self.processes) as executor:
+            contents = chain.from_iterable(
+                executor.map(_render_resources, chunks))
+            for resource, content in zip(resources, contents):
+                self.write_output(
+                    self.get_resource_filename(resource), content)
 
     def generate_documents(self):
         for document in self.docs_root.documents:
@@ -49,6 +216,69 @@ class BaseGenerator:
 
     def clean_destination(self):
         shutil.rmtree(self.destination_dir)
+        self._files.clear()
+        self._directories.clear()
+
+    def load_manifest(self) -> dict:
+        """ Content hashes of the previous build by filename """
+        try:
+            with open(join(self.destination_dir,
+                           self.manifest_filename)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def commit_outputs(self) -> GenerateSummary:
+        """
+        Write the changed outputs of an incremental build, and delete the
+        files of the previous build that are not generated anymore.
+        """
+        summary = GenerateSummary()
+        previous_manifest = self.load_manifest()
+        manifest = {}
+        for filename in sorted(set(self._outputs) | set(self._streams)):
+            path = join(self.destination_dir, filename)
+            if filename in self._streams:
+                temp_path, digest = self._streams[filename]
+                content = None
+            else:
+                content = ''.join(self._outputs[filename])
+                digest = hashlib.sha1(content.encode()).hexdigest()
+                temp_path = '%s.tmp' % path
+            manifest[filename] = digest
+
+            previous_digest = previous_manifest.get(filename)
+            if previous_digest == digest and exists(path):
+                summary.unchanged.append(filename)
+                if content is None:
+                    remove(temp_path)
+                continue
+
+            if content is not None:
+                self._ensure_directory(dirname(path))
+                with open(temp_path, 'w') as f:
+                    f.write(content)
+            replace(temp_path, path)
+            if previous_digest is None:
+                summary.created.append(filename)
+            else:
+                summary.updated.append(filename)
+
+        for filename in sorted(set(previous_manifest) - set(manifest)):
+            try:
+                remove(join(self.destination_dir, filename))
+            except FileNotFoundError:
+                continue
+            summary.deleted.append(filename)
+
+        makedirs(self.destination_dir, exist_ok=True)
+        with open(join(self.destination_dir,
+                       self.manifest_filename), 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        self._outputs.clear()
+        self._streams.clear()
+        return summary
 
     def get_resource_filename(self, resource: Resource):
         return "%s" % resource.__filename__
@@ -71,7 +301,28 @@ class BaseGenerator:
         raise NotImplementedError
 
     def generate(self):
-        self.clean_destination()
+        """
+        :return: A :class:`GenerateSummary` of an incremental build
+        """
+        if not self.incremental:
+            self.clean_destination()
         self.generate_documents()
         self.generate_resources()
         self.generate_index()
+        if self.incremental:
+            return self.commit_outputs()
+
+
+_render_worker = None
+
+
+def _render_resources(task):
+    global _render_worker
+    (token, payload), indices = task
+    if _render_worker is None or _render_worker[0] != token:
+        generator = pickle.loads(payload)
+        _render_worker = token, generator, list(generator.iter_resources())
+
+    _, generator, resources = _render_worker
+    return [generator.render_resource(resources[index])
+            for index in indices]
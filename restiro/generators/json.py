@@ -1,8 +1,48 @@
 import json
 
+from typing import Iterable
+
 from restiro.generators import BaseGenerator
 
 
+class JSONArrayStream:
+    """ JSON array encoded item by item """
+
+    def __init__(self, items: Iterable):
+        self.items = items
+
+
+class JSONObjectStream(JSONArrayStream):
+    """ JSON object encoded item by item, of ``(key, value)`` items """
+
+
+def write_json(file_stream, value, encode=json.JSONEncoder().encode):
+    """
+    Write a JSON value, like ``json.dumps`` with the default options does.
+    Items of :class:`JSONArrayStream` and :class:`JSONObjectStream` values
+    are encoded one at a time.
+    """
+    if isinstance(value, JSONObjectStream):
+        file_stream.write('{')
+        for index, (key, item) in enumerate(value.items):
+            if index:
+                file_stream.write(', ')
+            file_stream.write('%s: ' % encode(key))
+            write_json(file_stream, item, encode)
+        file_stream.write('}')
+
+    elif isinstance(value, JSONArrayStream):
+        file_stream.write('[')
+        for index, item in enumerate(value.items):
+            if index:
+                file_stream.write(', ')
+            write_json(file_stream, item, encode)
+        file_stream.write(']')
+
+    else:
+        file_stream.write(encode(value))
+
+
 class JSONGenerator(BaseGenerator):
 
     def get_index_filename(self):
@@ -20,5 +60,22 @@ class JSONGenerator(BaseGenerator):
     def write_document(self, file_stream, document):  # pragma: nocover
         pass
 
+    def generate_index(self):
+        # The index may hold hundreds of MBs of examples, it's streamed
+        with self._ensure_stream(self.get_index_filename()) as f:
+            self.write_index(f)
+
     def write_index(self, file_stream):
-        file_stream.write(json.dumps(self.docs_root.to_dict()))
+        """ Write ``DocumentationRoot.to_dict()``, one resource at a time """
+        docs_root = self.docs_root
+        write_json(file_stream, JSONObjectStream((
+            ('title', docs_root.title),
+            ('locale', docs_root.locale),
+            ('version', docs_root.version),
+            ('base_uri', docs_root.base_uri),
+            ('documents', JSONArrayStream(
+                document.to_dict() for document in docs_root.documents)),
+            ('resources', JSONArrayStream(
+                resource.to_dict()
+                for resource in docs_root.resources.values())),
+        )))
@@ -0,0 +1,76 @@
+import json
+
+from restiro import Resource, Document
+from restiro.generators import BaseGenerator
+from restiro.generators.json import (
+    JSONGenerator,
+    JSONArrayStream,
+    JSONObjectStream,
+    write_json
+)
+
+
+class ShardedJSONGenerator(JSONGenerator):
+    """
+    JSON output for clients that load resources lazily: a compact
+    ``index.json`` of titles and file references, and a JSON file per
+    resource and per document, as of their ``to_dict()``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Resources may have the same filename, e.g. `/a-b` and `/a/b`
+        self._resource_filenames = {}
+        self._used_filenames = set()
+
+    def get_resource_filename(self, resource: Resource):
+        filename = self._resource_filenames.get(id(resource))
+        if filename is None:
+            base_filename = 'resources/%s' % resource.__filename__
+            filename = '%s.json' % base_filename
+            suffix = 1
+            while filename in self._used_filenames:
+                suffix += 1
+                filename = '%s-%s.json' % (base_filename, suffix)
+            self._resource_filenames[id(resource)] = filename
+            self._used_filenames.add(filename)
+        return filename
+
+    def get_document_filename(self, document: Document):
+        return 'documents/%s.json' % document.__filename__
+
+    # Files per item, skipping the index-only behaviour of `JSONGenerator`
+    generate_documents = BaseGenerator.generate_documents
+    generate_resources = BaseGenerator.generate_resources
+
+    def write_resource(self, file_stream, resource: Resource):
+        file_stream.write(json.dumps(resource.to_dict()))
+
+    def write_document(self, file_stream, document: Document):
+        file_stream.write(json.dumps(document.to_dict()))
+
+    def write_index(self, file_stream):
+        docs_root = self.docs_root
+        write_json(file_stream, JSONObjectStream((
+            ('title', docs_root.title),
+            ('locale', docs_root.locale),
+            ('version', docs_root.version),
+            ('base_uri', docs_root.base_uri),
+            ('documents', JSONArrayStream(
+                {
+                    'title': document.title,
+                    'file': self.get_document_filename(document)
+                }
+                for document in docs_root.documents
+            )),
+            ('resources', JSONArrayStream(
+                {
+                    'path': resource.path,
+                    'method': resource.method,
+                    'display_name': resource.display_name,
+                    'tags': resource.tags,
+                    'file': self.get_resource_filename(resource)
+                }
+                for resource in self.iter_resources()
+            )),
+        )))
@@ -3,7 +3,7 @@ import re
 import collections
 import tempfile
 
-from os import makedirs
+from os import makedirs, scandir, remove, environ
 from os.path import join
 from shutil import rmtree
 
@@ -34,11 +34,28 @@ def get_examples_dir():
 
 
 def clean_examples_dir():
-    rmtree(get_examples_dir())
+    run_id = environ.get('PYTEST_XDIST_TESTRUNUID')
+    if not run_id:
+        rmtree(get_examples_dir())
+        return
+
+    # A pytest-xdist worker, keep the shards of this run's other workers
+    for dir_entry in scandir(get_examples_dir()):
+        if dir_entry.is_file() and not dir_entry.name.startswith(run_id):
+            try:
+                remove(dir_entry.path)
+            except FileNotFoundError:  # pragma: nocover
+                # Removed by another worker
+                pass
 
 
 def generate_pot(translations):
-    return ''.join(['msgid "%s"\nmsgstr ""\n\n' % t for t in translations])
+    from restiro.catalog import Catalog
+
+    catalog = Catalog()
+    for translation in translations:
+        catalog.add(translation)
+    return catalog.to_po()
 
 
 def validate_locale_name(locale):
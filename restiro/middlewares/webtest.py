@@ -1,6 +1,4 @@
-
-from os.path import join
-from uuid import uuid4
+from os import environ
 
 from webtest import TestApp as WebtestApp
 
@@ -10,24 +8,50 @@ from restiro import (
     ExampleResponse
 )
 from restiro.helpers import get_examples_dir
+from restiro.models.example_store import (
+    get_example_log,
+    get_current_test_id
+)
 
 
 class TestApp(WebtestApp):
 
-    def __init__(self, *args, examples_dir: str=None, **kwargs):
+    def __init__(self, *args, examples_dir: str=None,
+                 examples_shard: str=None, background_writer: bool=False,
+                 **kwargs):
+        """
+        :param examples_dir: Directory to record examples into
+        :param examples_shard: Shard of the examples log, defaults to the
+                               pytest-xdist worker name. Test apps of a
+                               process share the log of a shard.
+        :param background_writer: Serialize and write examples in a
+                                  background thread, call
+                                  :meth:`flush_examples` before loading them
+                                  in the same process
+        """
         self._examples_dir = examples_dir or get_examples_dir()
+        self._examples_shard = \
+            examples_shard or environ.get('PYTEST_XDIST_WORKER')
+        self._background_writer = background_writer
         self.doc = False
         self.force_doc = False
-        self.requests_index = 0
         super().__init__(*args, **kwargs)
 
+    @property
+    def _examples_log(self):
+        # Looked up on each use, the log is replaced if its file is removed
+        return get_example_log(
+            self._examples_dir,
+            shard=self._examples_shard,
+            background_writer=self._background_writer
+        )
+
     def do_request(self, req, status=None, expect_errors=None):
         if not self.doc and not self.force_doc:
             return super().do_request(req=req, status=status,
                                       expect_errors=expect_errors)
 
         self.doc = False
-        self.requests_index += 1
 
         # Fill example
         example_request = ExampleRequest(
@@ -49,15 +73,16 @@ class TestApp(WebtestApp):
             headers=dict(response.headers),
             reason=response.status[3:].strip())
 
-        example_filename = join(
-            self._examples_dir,
-            '%s-%s.pickle' % (self.requests_index, uuid4().hex))
-
-        ResourceExample(
-            request=example_request,
-            response=example_response
-        ).dump(
-            example_filename
+        self._examples_log.append(
+            ResourceExample(
+                request=example_request,
+                response=example_response
+            ),
+            test_id=get_current_test_id()
         )
 
         return response
+
+    def flush_examples(self):
+        """ Make sure recorded examples are written into the examples log """
+        self._examples_log.flush()
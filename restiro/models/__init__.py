@@ -11,6 +11,7 @@ from .example import (
     BodyFormatYaml,
     BodyFormatXml
 )
+from .example_policy import ExamplePolicy
 from .resource import Resource, Resources
 from .document import Document
 from .root import DocumentationRoot
@@ -1,8 +1,10 @@
 from restiro.helpers import to_snake_case, replace_non_alphabet
 from .translation_mixin import TranslationMixin
+from .slots_mixin import SlotsMixin
 
 
-class Document(TranslationMixin):
+class Document(TranslationMixin, SlotsMixin):
+    __slots__ = ('title', 'content')
     __translation_keys__ = (
         'title',
         'content'
@@ -53,3 +55,6 @@ class Documents(list):
     def translate(self, translator):
         for document in self:
             document.translate(translator)
+
+    def translated(self, translator) -> 'Documents':
+        return Documents(document.translated(translator) for document in self)
@@ -1,9 +1,10 @@
 import json
 import pickle
 
-from typing import Union
+from functools import lru_cache
+from typing import Union, Tuple
 
-from restiro.helpers import CaseInsensitiveDict
+from .slots_mixin import SlotsMixin
 
 
 class BodyFormat:
@@ -31,7 +32,159 @@ class BodyFormatYaml(BodyFormat):
     header_mime = 'application/x-yaml'
 
 
-class ExampleRequest:
+# Body formats by MIME type, and by structured syntax suffix (RFC 6839)
+mime_registry = {}
+mime_suffix_registry = {}
+
+
+def register_body_format(body_format, *mimes: str, suffix: str = None):
+    """
+    Register a body format
+
+    :param body_format: A :class:`BodyFormat` subclass
+    :param mimes: MIME types, defaults to ``body_format.header_mime``
+    :param suffix: Structured syntax suffix, e.g. ``+json``
+    """
+    for mime in mimes or (body_format.header_mime,):
+        mime_registry[mime.lower()] = body_format
+    if suffix is not None:
+        mime_suffix_registry[suffix.lower()] = body_format
+    parse_content_type.cache_clear()
+
+
+@lru_cache(maxsize=1024)
+def parse_content_type(content_type: str) -> Tuple[
+        Union[BodyFormat, None], Union[str, None]]:
+    """
+    Get body format and charset of a ``Content-Type`` header value, e.g.
+    ``application/problem+json; charset="utf-8"``.
+    """
+    mime, *parameters = content_type.split(';')
+    mime = mime.strip().lower()
+    body_format = mime_registry.get(mime)
+    if body_format is None and '+' in mime:
+        body_format = mime_suffix_registry.get(mime[mime.rindex('+'):])
+
+    charset = None
+    for parameter in parameters:
+        name, _, value = parameter.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = value.strip().strip('"').lower() or None
+    return body_format, charset
+
+
+register_body_format(BodyFormatJson, suffix='+json')
+register_body_format(BodyFormatXml, BodyFormatXml.header_mime, 'text/xml',
+                     suffix='+xml')
+register_body_format(BodyFormatYaml, BodyFormatYaml.header_mime,
+                     'application/yaml', 'text/yaml')
+
+
+class LazyBody:
+    """
+    Body stored in a file, e.g. an examples log. It's read on each access
+    and never kept by the model, the file is open only while reading.
+    """
+    __slots__ = ('filename', 'offset', 'length', 'binary')
+
+    def __init__(self, filename: str, offset: int, length: int,
+                 binary: bool = False):
+        self.filename = filename
+        self.offset = offset
+        self.length = length
+        self.binary = binary
+
+    def read(self, size: int = None) -> bytes:
+        """ Read the raw body, or up to ``size`` bytes of it """
+        size = self.length if size is None else min(size, self.length)
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            return f.read(size)
+
+    def load(self) -> Union[str, bytes]:
+        data = self.read()
+        return data if self.binary else data.decode('utf-8', 'surrogatepass')
+
+    def __repr__(self):
+        return '<LazyBody %d bytes>' % self.length
+
+
+class ExampleMessage(SlotsMixin):
+    """
+    Base of recorded requests and responses, parsing of the content type
+    is memoized by header value and the derived bodies by body and content
+    type.
+    """
+    # Slots with a leading underscore are not pickled as is
+    __slots__ = ('headers', '_body', '_cache')
+
+    @property
+    def body(self):
+        body = self._body
+        return body.load() if isinstance(body, LazyBody) else body
+
+    @body.setter
+    def body(self, value):
+        self._body = value
+
+    @property
+    def raw_body(self) -> Union[str, bytes, LazyBody, None]:
+        """ The body as stored, a :class:`LazyBody` is not read """
+        return self._body
+
+    @property
+    def body_loaded(self) -> bool:
+        """ Whether the body is in memory, not a :class:`LazyBody` """
+        return not isinstance(self._body, LazyBody)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['body'] = self.body
+        return state
+
+    @property
+    def content_type(self) -> Union[str, None]:
+        return self.headers.get('content-type') if self.headers else None
+
+    @property
+    def body_format(self) -> Union[BodyFormat, None]:
+        content_type = self.content_type
+        return parse_content_type(content_type)[0] if content_type else None
+
+    @property
+    def charset(self) -> Union[str, None]:
+        content_type = self.content_type
+        return parse_content_type(content_type)[1] if content_type else None
+
+    def _memoize(self, name: str, factory):
+        """
+        Memoize a value derived from ``body`` and the content type, until
+        one of them is changed
+        """
+        if not self.body_loaded:
+            # Values of lazy bodies are not kept in memory either
+            return factory()
+
+        try:
+            cache = self._cache
+        except AttributeError:
+            cache = self._cache = {}
+
+        body = self.body
+        content_type = self.content_type
+        cached = cache.get(name)
+        if cached is not None and cached[0] is body and \
+                cached[1] == content_type:
+            return cached[2]
+
+        value = factory()
+        cache[name] = body, content_type, value
+        return value
+
+
+class ExampleRequest(ExampleMessage):
+    __slots__ = ('path', 'method', 'query_strings', 'form_params')
+
     def __init__(self, path: str, method: str, headers: dict = None,
                  query_strings: dict = None, form_params: dict = None,
                  body: str = None):
@@ -46,22 +199,20 @@ class ExampleRequest:
         self.body = body
 
     @property
-    def body_format(self) -> Union[BodyFormat, None]:
-        content_type_raw = CaseInsensitiveDict(self.headers).\
-            get('Content-Type', None)
-        return {
-            BodyFormatJson.header_mime: BodyFormatJson,
-            BodyFormatYaml.header_mime: BodyFormatYaml,
-            BodyFormatXml.header_mime: BodyFormatXml
-        }.get(content_type_raw.split(';', 1)[0], None) \
-            if content_type_raw else None
+    def text(self) -> str:
+        """ Raw HTTP request, head and body """
+        return self.body or ''
 
     @property
     def body_text(self):
-        if self.body is None:
+        return self._memoize('body_text', self._split_body_text)
+
+    def _split_body_text(self):
+        body = self.body
+        if body is None:
             return ''
 
-        parsed_text = self.body.split('\r\n\r\n')
+        parsed_text = body.split('\r\n\r\n')
         return '\r\n\r\n'.join(parsed_text[1:]) \
             if len(parsed_text) > 1 else ''
 
@@ -80,7 +231,8 @@ class ExampleRequest:
         }
 
 
-class ExampleResponse:
+class ExampleResponse(ExampleMessage):
+    __slots__ = ('status', 'reason')
 
     def __init__(self, status: int, headers: dict, body: str, reason: str=None):
         self.status = status
@@ -91,21 +243,27 @@ class ExampleResponse:
         self.body = body
         self.reason = reason
 
-    @property
-    def body_format(self) -> Union[BodyFormat, None]:
-        content_type_raw = CaseInsensitiveDict(self.headers).\
-            get('Content-Type', None)
-        return {
-            BodyFormatJson.header_mime: BodyFormatJson,
-            BodyFormatYaml.header_mime: BodyFormatYaml,
-            BodyFormatXml.header_mime: BodyFormatXml
-        }.get(content_type_raw.split(';', 1)[0], None) \
-            if content_type_raw else None
-
     @property
     def body_json(self):
         return json.dumps(self.body, indent=4)
 
+    @property
+    def formatted_body(self) -> str:
+        """ Body to show, JSON bodies are indented """
+        return self._memoize('formatted_body', self._format_body)
+
+    def _format_body(self):
+        # A lazy body is read on each access
+        body = self.body
+        if self.body_format is BodyFormatJson:
+            try:
+                value = json.loads(body) \
+                    if isinstance(body, (str, bytes)) else body
+                return json.dumps(value, indent=4)
+            except (TypeError, ValueError):
+                pass
+        return '' if body is None else str(body)
+
     def to_dict(self):
         return {
             'status': self.status,
@@ -125,7 +283,9 @@ class ExampleResponse:
         )
 
 
-class ResourceExample:
+class ResourceExample(SlotsMixin):
+    __slots__ = ('request', 'response')
+
     def __init__(self, request: ExampleRequest, response: ExampleResponse):
         self.request = request
         self.response = response
@@ -0,0 +1,109 @@
+import hashlib
+
+from typing import Iterable, Iterator, Tuple
+
+from .example import ResourceExample, ExampleMessage, LazyBody
+
+
+class ExamplePolicy:
+    """
+    Which recorded examples are attached to resources, applied while the
+    examples are streamed in. Response bodies of dropped examples are never
+    read, request bodies are read for :meth:`signature` with ``dedupe``.
+
+    :param max_per_resource: Maximum number of examples per resource
+    :param max_per_status: Maximum number of examples per resource and
+                           response status code
+    :param dedupe: Keep only the first example of requests with the same
+                   signature, see :meth:`signature`
+    :param max_body_size: Bodies larger than this number of bytes are cut,
+                          and end with :attr:`truncation_marker`
+    """
+    truncation_marker = '\n... (truncated, %d bytes)'
+
+    def __init__(self, max_per_resource: int = None,
+                 max_per_status: int = None, dedupe: bool = False,
+                 max_body_size: int = None):
+        self.max_per_resource = max_per_resource
+        self.max_per_status = max_per_status
+        self.dedupe = dedupe
+        self.max_body_size = max_body_size
+
+    @staticmethod
+    def signature(example: ResourceExample) -> tuple:
+        """ Method, path, query strings, form params and body of request """
+        request = example.request
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8', 'surrogatepass')
+        return (
+            request.method,
+            request.path,
+            # Values may be lists
+            repr(sorted((request.query_strings or {}).items())),
+            repr(sorted((request.form_params or {}).items())),
+            hashlib.sha1(body).digest() if body else None
+        )
+
+    def truncate(self, message: ExampleMessage):
+        """ Cut the body of a message, a lazy body is read up to the limit """
+        body = message.raw_body
+        if isinstance(body, LazyBody):
+            length = body.length
+            if length <= self.max_body_size:
+                return
+            data = body.read(self.max_body_size)
+            binary = body.binary
+
+        elif isinstance(body, (str, bytes)):
+            binary = isinstance(body, bytes)
+            data = body if binary else body.encode('utf-8', 'surrogatepass')
+            length = len(data)
+            if length <= self.max_body_size:
+                return
+            data = data[:self.max_body_size]
+
+        else:
+            return
+
+        marker = self.truncation_marker % length
+        if binary:
+            message.body = data + marker.encode()
+        else:
+            # A character may be cut at the limit
+            message.body = data.decode('utf-8', 'ignore') + marker
+
+    def apply(self, resource_examples: Iterable[Tuple]) -> Iterator[Tuple]:
+        """
+        Filter ``(resource, example)`` pairs, examples are kept in order
+        """
+        resource_counts = {}
+        status_counts = {}
+        signatures = set()
+        for resource, example in resource_examples:
+            resource_key = id(resource)
+            if self.max_per_resource is not None and \
+                    resource_counts.get(resource_key, 0) >= \
+                    self.max_per_resource:
+                continue
+
+            status_key = resource_key, example.response.status
+            if self.max_per_status is not None and \
+                    status_counts.get(status_key, 0) >= self.max_per_status:
+                continue
+
+            if self.dedupe:
+                signature = resource_key, self.signature(example)
+                if signature in signatures:
+                    continue
+                signatures.add(signature)
+
+            resource_counts[resource_key] = \
+                resource_counts.get(resource_key, 0) + 1
+            status_counts[status_key] = status_counts.get(status_key, 0) + 1
+
+            if self.max_body_size is not None:
+                self.truncate(example.request)
+                self.truncate(example.response)
+
+            yield resource, example
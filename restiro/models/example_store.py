@@ -0,0 +1,434 @@
+import time
+import queue
+import atexit
+import pickle
+import struct
+import hashlib
+import itertools
+import threading
+
+from copy import copy
+from collections import OrderedDict
+
+from os import scandir, makedirs, environ, fstat, getpid
+from os.path import join, abspath, exists
+from uuid import uuid4
+from typing import Iterator
+
+from .example import ResourceExample, LazyBody
+
+_session_id = None
+# Recording order of the examples of this process, across logs
+_sequence = itertools.count(1)
+# Shared logs of this process, by examples directory and shard
+_logs = {}
+# Logs kept open while loading examples, file descriptors are limited
+max_open_logs = 32
+
+
+class ExampleLog:
+    """
+    Append-only log of recorded examples, one file per test session and
+    worker (shard).
+
+    File layout: ``magic``, then records of three big-endian ``uint32``
+    lengths followed by the pickled sort key, the blobs and the pickled
+    :class:`ResourceExample` without its bodies and headers.
+    The sort key is ``(session, test_id, shard, sequence)``, which gives a
+    stable global order for shards recorded concurrently. The sequence is
+    shared by the logs of a process, so logs of the same shard are merged
+    in recording order too.
+
+    Bodies and headers are stored apart from the pickle as blobs, so
+    bodies are read from the log only when they are rendered. Blobs are
+    interned by content. A body or a header set seen before in the log is
+    not written again, and the record refers to its first copy.
+    """
+    magic = b'RESTIRO-EXAMPLES\x04'
+    extension = '.examples'
+    record_header = struct.Struct('>III')
+
+    def __init__(self, filename: str, session: str = '', shard: str = ''):
+        self.filename = filename
+        self.session = session
+        self.shard = shard
+        # Sequence of the last appended example
+        self.sequence = 0
+        self._file = None
+        # Digest of written blobs: (offset, length)
+        self._blobs = {}
+
+    @classmethod
+    def create(cls, examples_dir: str, shard: str = None,
+               session: str = None) -> 'ExampleLog':
+        """
+        Create a new log in examples directory
+
+        :param examples_dir:
+        :param shard: Worker name, e.g. ``gw0`` of pytest-xdist
+        :param session: Test run id shared by workers, defaults to the
+                        pytest-xdist run id or the current process session
+        """
+        makedirs(examples_dir, exist_ok=True)
+        session = session or get_session_id()
+        shard = shard or ''
+        return cls(
+            join(examples_dir, '%s-%s-%s%s' % (
+                session, shard or 'main', uuid4().hex, cls.extension)),
+            session=session,
+            shard=shard
+        )
+
+    def append(self, example: ResourceExample, test_id: str = '',
+               flush: bool = True, sequence: int = None):
+        """
+        Append an example
+
+        :param example:
+        :param test_id: Id of the test recorded the example, examples are
+                        ordered by test then by recording order
+        :param flush: Flush the file, so the log is readable by the same
+                      process at once
+        :param sequence: Recording order, see :func:`next_sequence`
+        """
+        if self._file is None:
+            self._file = open(self.filename, 'ab')
+            if self._file.tell() == 0:
+                # A new or emptied file, no blobs to refer to
+                self._blobs.clear()
+                self._file.write(self.magic)
+
+        self.sequence = next_sequence() if sequence is None else sequence
+        key = pickle.dumps(
+            (self.session, test_id or '', self.shard, self.sequence),
+            pickle.HIGHEST_PROTOCOL
+        )
+        blobs_offset = \
+            self._file.tell() + self.record_header.size + len(key)
+        example, blob_refs, blobs = self.split_blobs(example, blobs_offset)
+        payload = pickle.dumps((example, blob_refs), pickle.HIGHEST_PROTOCOL)
+        self._file.write(self.record_header.pack(
+            len(key), len(payload), len(blobs)))
+        self._file.write(key)
+        self._file.write(blobs)
+        self._file.write(payload)
+        if flush:
+            self._file.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def split_blobs(self, example: ResourceExample, offset: int):
+        """
+        Take string and bytes bodies and headers out of an example, those
+        already written in the log are referred by their first copy.
+
+        :param example:
+        :param offset: Offset of the record blobs in the log
+        :return: The example without those bodies and headers (the given one
+                 is kept intact), ``(message, attribute, offset, length,
+                 binary)`` references of the blobs in the log and the new
+                 blobs joined.
+        """
+        example = copy(example)
+        blob_refs = []
+        blobs = []
+        for name in ('request', 'response'):
+            message = getattr(example, name, None)
+            if message is None:
+                continue
+
+            message = copy(message)
+            setattr(example, name, message)
+            body = message.body
+            if isinstance(body, (str, bytes)):
+                binary = isinstance(body, bytes)
+                data = body if binary else \
+                    body.encode('utf-8', 'surrogatepass')
+                message.body = None
+                blob_refs.append((name, 'body') + self._intern_blob(
+                    data, offset, blobs) + (binary, ))
+
+            if message.headers:
+                data = pickle.dumps(message.headers, pickle.HIGHEST_PROTOCOL)
+                message.headers = None
+                blob_refs.append((name, 'headers') + self._intern_blob(
+                    data, offset, blobs) + (True, ))
+        return example, blob_refs, b''.join(blobs)
+
+    def _intern_blob(self, data: bytes, offset: int, blobs: list):
+        digest = hashlib.sha1(data).digest()
+        location = self._blobs.get(digest)
+        if location is None:
+            location = self._blobs[digest] = \
+                offset + sum(map(len, blobs)), len(data)
+            blobs.append(data)
+        return location
+
+    @classmethod
+    def _iter_records(cls, f):
+        if f.read(len(cls.magic)) != cls.magic:
+            raise ValueError('Not an examples log: %s' % f.name)
+
+        size = fstat(f.fileno()).st_size
+        header_size = cls.record_header.size
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                # End of log, or a record cut by an interrupted session
+                return
+
+            key_length, payload_length, blobs_length = \
+                cls.record_header.unpack(header)
+            # Blobs come before the pickle
+            payload_offset = f.tell() + key_length + blobs_length
+            record_end = payload_offset + payload_length
+            if record_end > size:
+                return
+
+            key = pickle.loads(f.read(key_length))
+            f.seek(record_end)
+            yield key, payload_offset, payload_length
+
+    @classmethod
+    def read_index(cls, filename: str):
+        """
+        Get ``(key, offset, length)`` of records, payloads are skipped
+        """
+        with open(filename, 'rb') as f:
+            return list(cls._iter_records(f))
+
+    @staticmethod
+    def load_record(f, offset: int, length: int, bodies: dict = None,
+                    headers: dict = None) -> ResourceExample:
+        """
+        Load an example, bodies are left in the log
+
+        :param f: The log, opened in binary mode
+        :param offset:
+        :param length:
+        :param bodies: Lazy bodies of the log by offset, examples sharing
+                       a body get the same object
+        :param headers: Loaded headers by their pickle, each header set is
+                        unpickled once and examples get their own copy
+        """
+        f.seek(offset)
+        example, blob_refs = pickle.loads(f.read(length))
+        bodies = {} if bodies is None else bodies
+        headers = {} if headers is None else headers
+        for name, attribute, blob_offset, blob_length, binary in blob_refs:
+            message = getattr(example, name)
+            if attribute == 'headers':
+                f.seek(blob_offset)
+                data = f.read(blob_length)
+                value = headers.get(data)
+                if value is None:
+                    value = headers[data] = pickle.loads(data)
+                # Keys and values are shared, the dict is not
+                message.headers = dict(value)
+            else:
+                body_key = blob_offset, blob_length, binary
+                value = bodies.get(body_key)
+                if value is None:
+                    value = bodies[body_key] = LazyBody(
+                        f.name, blob_offset, blob_length, binary)
+                message.body = value
+        return example
+
+    @classmethod
+    def read(cls, filename: str) -> Iterator[ResourceExample]:
+        """ Yield examples of a log in recording order """
+        bodies = {}
+        headers = {}
+        with open(filename, 'rb') as f:
+            for key, *record in list(cls._iter_records(f)):
+                yield cls.load_record(f, *record, bodies, headers)
+
+
+class BackgroundExampleLog:
+    """
+    Serialize and write examples of an :class:`ExampleLog` in a background
+    thread, in batches. Appending only puts the example on a bounded queue,
+    pending examples are written on :meth:`flush`, :meth:`close` or at
+    interpreter exit.
+    """
+
+    def __init__(self, log: ExampleLog, max_size: int = 1024,
+                 batch_size: int = 128):
+        self.log = log
+        self.batch_size = batch_size
+        self._queue = queue.Queue(max_size)
+        self._thread = None
+        self._error = None
+
+    @property
+    def filename(self):
+        return self.log.filename
+
+    def append(self, example: ResourceExample, test_id: str = ''):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._write_batches,
+                name='restiro-examples-writer',
+                daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+        # Ordered when appended, not when written
+        self._queue.put((example, test_id, next_sequence()))
+
+    def _write_batches(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                for item in batch:
+                    if item is not None:
+                        example, test_id, sequence = item
+                        self.log.append(example, test_id, flush=False,
+                                        sequence=sequence)
+                self.log.flush()
+            except Exception as ex:  # pragma: nocover
+                self._error = ex
+
+            for _ in batch:
+                self._queue.task_done()
+
+            if batch[-1] is None:
+                return
+
+    def flush(self):
+        """ Block until all appended examples are written """
+        if self._thread is not None:
+            self._queue.join()
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        if self._thread is not None:
+            # `None` stops the writer after the pending examples
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.close)
+
+        self.log.close()
+        self.flush()
+
+
+def get_example_log(examples_dir: str, shard: str = None,
+                    background_writer: bool = False):
+    """
+    Get the examples log of this process for an examples directory and
+    shard, it's created on first use and shared by all callers.
+
+    :param examples_dir:
+    :param shard: Worker name, e.g. ``gw0`` of pytest-xdist
+    :param background_writer: Get a :class:`BackgroundExampleLog`
+    """
+    key = getpid(), abspath(examples_dir), shard or '', background_writer
+    log = _logs.get(key)
+    if log is not None:
+        file_log = log.log if background_writer else log
+        if file_log.sequence and not exists(file_log.filename):
+            # Removed by cleaning the examples directory, start a new one
+            log.close()
+            log = None
+
+    if log is None:
+        log = ExampleLog.create(examples_dir, shard=shard)
+        if background_writer:
+            log = BackgroundExampleLog(log)
+        _logs[key] = log
+    return log
+
+
+def next_sequence() -> int:
+    """ Next recording order number of this process """
+    return next(_sequence)
+
+
+def get_session_id():
+    """
+    Test run id, shared by the workers of a pytest-xdist run
+    """
+    global _session_id
+    if _session_id is None:
+        _session_id = environ.get('PYTEST_XDIST_TESTRUNUID') or \
+            '%016d' % int(time.time() * 1000000)
+    return _session_id
+
+
+def get_current_test_id():
+    """ Node id of the running pytest test, if any """
+    current_test = environ.get('PYTEST_CURRENT_TEST')
+    # Format: `path::name (phase)`
+    return current_test.rsplit(' ', 1)[0] if current_test else ''
+
+
+def iter_examples(examples_dir: str) -> Iterator[ResourceExample]:
+    """
+    Yield recorded examples in a stable order. Examples of the legacy
+    layout, one ``{index}-{uuid}.pickle`` file per example, come first.
+    Then the records of all logs are merged by their keys, that is by
+    session, test, shard and recording order.
+    """
+    pickle_entries = []
+    log_entries = []
+    for dir_entry in scandir(examples_dir):
+        if dir_entry.name.endswith('.pickle'):
+            pickle_entries.append(dir_entry)
+        elif dir_entry.name.endswith(ExampleLog.extension):
+            log_entries.append(dir_entry)
+
+    # Sort examples by index number from filename (generated by middleware)
+    for dir_entry in sorted(pickle_entries,
+                            key=lambda k: int(k.name.split('-')[0])):
+        yield ResourceExample.load(dir_entry.path)
+
+    records = []
+    for dir_entry in log_entries:
+        for key, *record in ExampleLog.read_index(dir_entry.path):
+            records.append((key, dir_entry.path, record))
+    records.sort(key=lambda record: record[0])
+
+    # Bodies are not loaded, they are read from their log when needed.
+    # Identical bodies of a log are loaded once, headers of all logs
+    # unpickled once.
+    files = OrderedDict()
+    bodies = {}
+    headers = {}
+    try:
+        for key, filename, record in records:
+            f = files.pop(filename, None)
+            if f is None:
+                if len(files) >= max_open_logs:
+                    files.popitem(last=False)[1].close()
+                f = open(filename, 'rb')
+            # Most recently used last
+            files[filename] = f
+            yield ExampleLog.load_record(
+                f, *record, bodies.setdefault(filename, {}), headers)
+    finally:
+        for f in files.values():
+            f.close()
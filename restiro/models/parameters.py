@@ -1,4 +1,5 @@
 from .translation_mixin import TranslationMixin
+from .slots_mixin import SlotsMixin
 
 python_type_alias = {
     'int': 'integer',
@@ -20,7 +21,12 @@ python_type_alias = {
 }
 
 
-class Param(TranslationMixin):
+class Param(TranslationMixin, SlotsMixin):
+    __slots__ = (
+        'name', 'display_name', 'description', 'type_', 'enum', 'pattern',
+        'min_length', 'max_length', 'minimum', 'maximum', 'example', 'repeat',
+        'required', 'default'
+    )
     __translation_keys__ = (
         'description',
         'display_name'
@@ -165,17 +171,19 @@ class Param(TranslationMixin):
 
 
 class URLParam(Param):
+    __slots__ = ()
+
     def __init__(self, *args, required: bool = True, **kwargs):
         super().__init__(*args, required=required, **kwargs)
 
 
 class QueryParam(Param):
-    pass
+    __slots__ = ()
 
 
 class FormParam(Param):
-    pass
+    __slots__ = ()
 
 
 class HeaderParam(Param):
-    pass
+    __slots__ = ()
@@ -1,12 +1,19 @@
+from copy import copy
 from types import GeneratorType
 from typing import List, Union, Generator
 
 from .parameters import URLParam, FormParam, HeaderParam, QueryParam, Param
 from .example import ResourceExample
 from .translation_mixin import TranslationMixin
+from .slots_mixin import SlotsMixin
 
 
-class Resource(TranslationMixin):
+class Resource(TranslationMixin, SlotsMixin):
+    __slots__ = (
+        'path', 'method', 'display_name', 'description', 'tags',
+        'uri_params', 'query_params', 'form_params', 'header_params',
+        'security', 'examples', 'filename', 'start_line'
+    )
     __translation_keys__ = (
         'description',
         'display_name'
@@ -16,7 +23,8 @@ class Resource(TranslationMixin):
                  description: str = None, tags: List[str] = None,
                  params: Union[Param, List[Param], Generator] = None,
                  security: dict = None,
-                 examples: Union[List[ResourceExample], Generator] = None):
+                 examples: Union[List[ResourceExample], Generator] = None,
+                 filename: str = None, start_line: int = None):
         """
         Resource
         :param path: The URI relative to the `DocumentationRoot.base_uri` and 
@@ -38,6 +46,8 @@ class Resource(TranslationMixin):
                        of `Param`)
         :param security: Collection of permissions
         :param examples: Collection of examples
+        :param filename: Source file the resource is documented in
+        :param start_line: Line number of the docstring in ``filename``
         """
         self.path = path
         self.method = method
@@ -50,6 +60,8 @@ class Resource(TranslationMixin):
         self.security = security
         self.header_params = []
         self.examples = examples if examples else []
+        self.filename = filename
+        self.start_line = start_line
 
         if params:
             if isinstance(params, list):
@@ -92,6 +104,13 @@ class Resource(TranslationMixin):
     def __filename__(self):
         return str(self.__key__).lstrip('/').replace('/', '-')
 
+    param_lists = (
+        'uri_params',
+        'query_params',
+        'header_params',
+        'form_params'
+    )
+
     def to_dict(self):
         return {
             'path': self.path,
@@ -115,41 +134,180 @@ class Resource(TranslationMixin):
             result.extend(param.extract_translations())
         return result
 
+    def translate(self, translator):
+        super().translate(translator)
+        for param in self.params:
+            param.translate(translator)
+
+    def translated(self, translator) -> 'Resource':
+        translated_params = {}
+        for key in self.param_lists:
+            params = getattr(self, key)
+            translated = [param.translated(translator) for param in params]
+            if any(a is not b for a, b in zip(translated, params)):
+                translated_params[key] = translated
+
+        result = super().translated(translator)
+        if translated_params:
+            if result is self:
+                result = copy(self)
+            for key, params in translated_params.items():
+                setattr(result, key, params)
+        return result
+
+
+class RouteNode:
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.resources = {}
+
+
+class RouteIndex:
+    """
+    Trie of resources over method and path segments. Literal segments take
+    precedence over ``:param`` segments while matching.
+    """
+
+    def __init__(self):
+        self.roots = {}
+
+    @staticmethod
+    def split_path(path: str):
+        return path[1:].split('/')
+
+    def _get_node(self, resource: Resource, create: bool = False):
+        if resource.path is None:
+            # Not routable, e.g. an api docstring missing its path
+            return None
+
+        node = self.roots.get(resource.method)
+        if node is None:
+            if not create:
+                return None
+            node = self.roots[resource.method] = RouteNode()
+
+        for part in self.split_path(resource.path):
+            if part[:1] == ':':
+                child = node.param
+                if child is None and create:
+                    child = node.param = RouteNode()
+            else:
+                child = node.children.get(part)
+                if child is None and create:
+                    child = node.children[part] = RouteNode()
+
+            if child is None:
+                return None
+            node = child
+
+        return node
+
+    def add(self, resource: Resource):
+        node = self._get_node(resource, create=True)
+        if node is not None:
+            node.resources[resource.__key__] = resource
+
+    def remove(self, resource: Resource):
+        node = self._get_node(resource)
+        if node is not None:
+            node.resources.pop(resource.__key__, None)
+
+    def find(self, path: str, method: str) -> Union[Resource, None]:
+        root = self.roots.get(method)
+        if root is None:
+            return None
+
+        parts = self.split_path(path)
+
+        def _route(node, part_index):
+            if part_index == len(parts):
+                for resource in node.resources.values():
+                    return resource
+                return None
+
+            child = node.children.get(parts[part_index])
+            if child is not None:
+                resource = _route(child, part_index + 1)
+                if resource is not None:
+                    return resource
+
+            if node.param is not None:
+                return _route(node.param, part_index + 1)
+
+            return None
+
+        return _route(root, 0)
+
 
 class Resources(dict):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._routes = RouteIndex()
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, key, resource: Resource):
+        if key in self:
+            self._routes.remove(self[key])
+        super().__setitem__(key, resource)
+        self._routes.add(resource)
+
+    def __delitem__(self, key):
+        self._routes.remove(self[key])
+        super().__delitem__(key)
+
+    def __reduce__(self):
+        return self.__class__, (), None, None, iter(self.items())
+
+    def update(self, *args, **kwargs):
+        for key, resource in dict(*args, **kwargs).items():
+            self[key] = resource
+
+    def pop(self, key, *args):
+        if key in self:
+            self._routes.remove(self[key])
+        return super().pop(key, *args)
+
+    def popitem(self):
+        key, resource = super().popitem()
+        self._routes.remove(resource)
+        return key, resource
+
+    def setdefault(self, key, resource: Resource = None):
+        if key not in self:
+            self[key] = resource
+        return self[key]
+
+    def clear(self):
+        super().clear()
+        self._routes = RouteIndex()
+
+    def copy(self) -> 'Resources':
+        return self.__class__(self)
+
+    def __or__(self, other) -> 'Resources':
+        result = self.copy()
+        result.update(other)
+        return result
+
+    def __ror__(self, other) -> 'Resources':
+        result = self.__class__(other)
+        result.update(self)
+        return result
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
     def append(self, resource: Resource):
         if not isinstance(resource, Resource):
             raise TypeError('item is not of type Resource')
         self[resource.__key__] = resource
 
     def find(self, path, method) -> Resource:
-        input_path_parts = path[1:].split('/')
-        filtered_resources = [
-            x for x in self.values()
-            if (
-                x.method == method and
-                len(x.path[1:].split('/')) == len(input_path_parts)
-            )
-        ]
-
-        def _route(resources, part_index=0):
-            matched_resources = []
-            for resource in resources:
-                resource_path_parts = resource.path[1:].split('/')
-                if (
-                    input_path_parts[part_index] ==
-                        resource_path_parts[part_index] or
-                        resource_path_parts[part_index][:1] == ':'
-                ):
-                    matched_resources.append(resource)
-
-            if part_index == len(input_path_parts) - 1:
-                return matched_resources[0] if matched_resources else None
-
-            return _route(matched_resources, part_index + 1)
-
-        return _route(resources=filtered_resources)
+        return self._routes.find(path, method)
 
     @property
     def __tree__(self):
@@ -178,3 +336,9 @@ class Resources(dict):
     def translate(self, translator):
         for resource in self.values():
             resource.translate(translator)
+
+    def translated(self, translator) -> 'Resources':
+        return Resources(
+            (key, resource.translated(translator))
+            for key, resource in self.items()
+        )
@@ -1,11 +1,13 @@
+from copy import copy
 from typing import List, Union
 from urllib.parse import urlparse
-from os import scandir
 
 from restiro.helpers import get_examples_dir
+from .example_store import iter_examples
+from .example_policy import ExamplePolicy
 from .resource import Resource, Resources
 from .document import Document, Documents
-from .translation_mixin import TranslationMixin
+from .translation_mixin import TranslationMixin, MemoTranslator
 
 
 class DocumentationRoot(TranslationMixin):
@@ -82,49 +84,80 @@ class DocumentationRoot(TranslationMixin):
         result = super().extract_translations()
         result.extend(self.documents.extract_translations())
         result.extend(self.resources.extract_translations())
-        return sorted(result)
+        return sorted(set(result))
 
     def translate(self, translator):
         super().translate(translator)
         self.documents.translate(translator)
         self.resources.translate(translator)
 
-    def translate_all(self, locales_dir, locale, domain: str = 'restiro'):
+    def translated(self, translator) -> 'DocumentationRoot':
+        """
+        Translated view of the tree, only translated models are copied and
+        everything else (e.g. examples) is shared with this tree.
+        """
+        result = super().translated(translator)
+        if result is self:
+            result = copy(self)
+        result.documents = self.documents.translated(translator)
+        result.resources = self.resources.translated(translator)
+        return result
+
+    @staticmethod
+    def get_translator(locales_dir, locale,
+                       domain: str = 'restiro') -> MemoTranslator:
+        """
+        Memoized gettext translator of a locale, a new one is made for each
+        call so lookups and stats are scoped to a build.
+        See :attr:`MemoTranslator.hit_rate` for stats.
+        """
         import gettext
         import locale as lib_locale
+        from errno import ENOENT
+
+        mo_file = gettext.find(domain, locales_dir, [locale])
+        if mo_file is None:
+            raise FileNotFoundError(
+                ENOENT, 'No translation file found for domain', domain)
+
+        # Not `gettext.translation`, it never reloads a compiled file
+        with open(mo_file, 'rb') as f:
+            translation = gettext.GNUTranslations(f)
 
-        translation = gettext.translation(
-            domain=domain,
-            localedir=locales_dir,
-            languages=[locale]
-        )
         try:
             lib_locale.setlocale(lib_locale.LC_ALL, locale)
         except lib_locale.Error:
             print('Invalid locale %s' % locale)
             raise
 
-        self.translate(translation.gettext)
+        return MemoTranslator(translation.gettext)
+
+    def translate_all(self, locales_dir, locale,
+                      domain: str = 'restiro') -> MemoTranslator:
+        translator = self.get_translator(locales_dir, locale, domain)
+        self.translate(translator)
+        return translator
+
+    def translated_all(self, locales_dir, locale,
+                       domain: str = 'restiro') -> 'DocumentationRoot':
+        """ Translated view of the tree in a locale """
+        result = self.translated(
+            self.get_translator(locales_dir, locale, domain))
+        result.locale = locale
+        return result
 
-    def load_resource_examples(self, examples_dir: str=None):
+    def iter_resource_examples(self, examples_dir: str=None):
         """
-        Load example objects into resources
+        Yield recorded examples with their resources, examples of unknown
+        resources are skipped.
 
         :param examples_dir:
-        :return:
+        :return: ``(resource, example)`` pairs
         """
-        from . import ResourceExample
         if not examples_dir:
             examples_dir = get_examples_dir()
 
-        # Sort examples by index number from filename (generated by middleware)
-        # Examples filename format: {index}-{uuid}.pickle
-        directories = sorted(scandir(examples_dir),
-                             key=lambda k: int(k.name.split('-')[0]))
-        for dir_entry in directories:
-            pickle_filename = dir_entry.path
-            resource_example = ResourceExample.load(pickle_filename)
-
+        for resource_example in iter_examples(examples_dir):
             resource_path = resource_example.request.path
             resource_method = resource_example.request.method
 
@@ -144,4 +177,20 @@ class DocumentationRoot(TranslationMixin):
             if not resource:
                 continue
 
+            yield resource, resource_example
+
+    def load_resource_examples(self, examples_dir: str=None,
+                               policy: ExamplePolicy=None):
+        """
+        Load example objects into resources
+
+        :param examples_dir:
+        :param policy: Limits of loaded examples, applied while loading
+        :return:
+        """
+        resource_examples = self.iter_resource_examples(examples_dir)
+        if policy is not None:
+            resource_examples = policy.apply(resource_examples)
+
+        for resource, resource_example in resource_examples:
             resource.examples.append(resource_example)
@@ -0,0 +1,44 @@
+class SlotsMixin:
+    """
+    Pickling for models with ``__slots__``.
+
+    The state is a dict of the attributes, the same as of the former
+    ``__dict__`` based models, so examples pickled by older versions load
+    and new pickles are readable by them.
+    """
+    __slots__ = ()
+
+    _slot_names = {}
+
+    @classmethod
+    def get_slot_names(cls):
+        try:
+            return cls._slot_names[cls]
+        except KeyError:
+            names = cls._slot_names[cls] = tuple(
+                name
+                for klass in reversed(cls.__mro__)
+                for name in klass.__dict__.get('__slots__', ())
+            )
+            return names
+
+    def __getstate__(self):
+        state = {}
+        for name in self.get_slot_names():
+            if name.startswith('_'):
+                # Caches are not pickled
+                continue
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                continue
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # `(dict_state, slots_state)` of the default protocol
+            dict_state, slots_state = state
+            state = dict(dict_state or {}, **(slots_state or {}))
+
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -1,6 +1,8 @@
+from copy import copy
 
 
 class TranslationMixin:
+    __slots__ = ()
     __translation_keys__: tuple = ()
 
     def extract_translations(self):
@@ -16,3 +18,63 @@ class TranslationMixin:
             if value is None:
                 continue
             setattr(self, key, translator(value))
+
+    def translated(self, translator):
+        """
+        Get a translated shallow copy, the original is left untouched and
+        everything else is shared with it. When nothing is translated the
+        object itself is returned.
+        """
+        translated_values = {}
+        for key in self.__translation_keys__:
+            value = getattr(self, key)
+            if value is None:
+                continue
+            translated_value = translator(value)
+            if translated_value != value:
+                translated_values[key] = translated_value
+
+        if not translated_values:
+            return self
+
+        result = copy(self)
+        for key, value in translated_values.items():
+            setattr(result, key, value)
+        return result
+
+
+class MemoTranslator:
+    """
+    Memoize a translator, e.g. ``gettext``. Many strings are repeated across
+    models (shared parameter descriptions, display names), so each one is
+    looked up in the catalog once.
+    """
+
+    def __init__(self, translator):
+        self.translator = translator
+        self.translations = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, value: str) -> str:
+        if not value:
+            # gettext translates the empty string to the catalog header
+            return value
+
+        try:
+            result = self.translations[value]
+        except KeyError:
+            self.misses += 1
+            result = self.translations[value] = self.translator(value)
+        else:
+            self.hits += 1
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        return '<MemoTranslator %d lookups, %.1f%% hits>' % (
+            self.hits + self.misses, self.hit_rate * 100)
@@ -1,20 +1,36 @@
 
 from restiro import Resources
-from .docstring import DocstringDefinitionParser, DocstringResourceParser
+from .cache import ParseCache
+from .docstring import (
+    DocstringDefinitionParser,
+    DocstringResourceParser,
+    DocstringProjectParser
+)
 
 
 class Parser:
 
     @staticmethod
-    def load_from_path(base_path: str = '.') -> Resources:
+    def load_from_path(base_path: str = '.', cache_file: str = None,
+                       jobs: int = None,
+                       extractor: str = 'regex') -> Resources:
         """
         Load and parse files 
         
         :param base_path: 
+        :param cache_file: Persistent parse cache, unchanged files will not
+                           be scanned again
+        :param jobs: Number of worker processes to scan files with
+        :param extractor: Docstring extraction engine, ``regex`` or
+                          ``tokenize`` which only picks api strings and
+                          supports ``'''`` quotes too
         :return: List of resources that grouped by version
         """
-        definition_parser = DocstringDefinitionParser()
-        definition_parser.load_from_path(base_path)
-        resource_parser = DocstringResourceParser(definition_parser.definitions)
-        resource_parser.load_from_path(base_path)
-        return resource_parser.export_to_model()
+        project_parser = DocstringProjectParser()
+        project_parser.extractor = extractor
+        project_parser.cache = ParseCache(cache_file, extractor=extractor) \
+            if cache_file else None
+        project_parser.load_from_path(base_path, jobs=jobs)
+        if project_parser.cache is not None:
+            project_parser.cache.save()
+        return project_parser.export_to_model()
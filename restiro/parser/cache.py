@@ -0,0 +1,113 @@
+import pickle
+import hashlib
+
+from os import stat, replace, makedirs
+from os.path import abspath, dirname, exists
+
+
+class ParseCache:
+    """
+    Persistent cache of the docstring blocks extracted from source files.
+
+    Entries are keyed by absolute path and validated by modification time and
+    size, so unchanged files are not even opened. When the stat changed but
+    the content hash did not (e.g. after a checkout), the stored blocks are
+    reused without scanning the source again.
+    """
+    version = 1
+
+    def __init__(self, filename: str, extractor: str = 'regex'):
+        self.filename = filename
+        self.extractor = extractor
+        self.entries = {}
+        self.touched = set()
+        self.changed = False
+        self.load()
+
+    @staticmethod
+    def digest(source: str):
+        return hashlib.sha1(source.encode()).hexdigest()
+
+    def load(self):
+        if not exists(self.filename):
+            return
+
+        try:
+            with open(self.filename, 'rb') as f:
+                version, extractor, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError,
+                pickle.UnpicklingError):
+            return
+
+        # Blocks extracted by another engine are not reusable
+        if version == self.version and extractor == self.extractor:
+            self.entries = entries
+
+    def save(self):
+        """ Write touched entries back, dropping files that were not seen """
+        if not self.changed and self.touched == set(self.entries):
+            return
+
+        entries = {
+            key: value
+            for key, value in self.entries.items()
+            if key in self.touched
+        }
+        makedirs(dirname(abspath(self.filename)), exist_ok=True)
+        temp_filename = '%s.tmp' % self.filename
+        with open(temp_filename, 'wb') as f:
+            pickle.dump((self.version, self.extractor, entries), f,
+                        pickle.HIGHEST_PROTOCOL)
+        replace(temp_filename, self.filename)
+        self.entries = entries
+        self.changed = False
+
+    @staticmethod
+    def signature(filename: str):
+        file_stat = stat(filename)
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def lookup(self, filename: str):
+        """ Return stored blocks of a file if its stat is unchanged """
+        key = abspath(filename)
+        self.touched.add(key)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == self.signature(key):
+            return entry[2]
+
+    def store(self, filename: str, signature: tuple, digest: str,
+              blocks: list):
+        key = abspath(filename)
+        self.touched.add(key)
+        self.entries[key] = (signature, digest, blocks)
+        self.changed = True
+
+    def get_blocks(self, filename: str, find_blocks):
+        """
+        Return the docstring blocks of a file, reading and scanning it only
+        when needed.
+
+        :param filename: Python source file
+        :param find_blocks: Callable that extracts blocks from a source string
+        :return: List of ``(docstring, start_line)``
+        """
+        blocks = self.lookup(filename)
+        if blocks is not None:
+            return blocks
+
+        signature = self.signature(filename)
+        with open(filename, 'r') as f:
+            source = f.read()
+
+        digest = self.digest(source)
+        entry = self.entries.get(abspath(filename))
+        if entry is not None and entry[1] == digest:
+            blocks = entry[2]
+        else:
+            blocks = [
+                block for block in find_blocks(source)
+                if block[0].startswith('@api')
+            ]
+
+        self.store(filename, signature, digest, blocks)
+        return blocks
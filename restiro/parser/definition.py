@@ -4,6 +4,8 @@ class DocstringApiDefinition:
     title = None
     description = ''
     content = ''
+    # Nested `@apiUse` expanded, filled by the first resource using it
+    expanded_lines = None
 
     def __init__(self, docstring):
         for line in docstring.split('\n'):
@@ -20,3 +22,8 @@ class DocstringApiDefinition:
 
             else:
                 self.content += line + '\n'
+
+        # Directive lines, other lines are ignored by resources anyway
+        self.lines = [
+            line for line in self.content.split('\n') if line[:1] == '@'
+        ]
@@ -1,48 +1,163 @@
 
+import io
 import re
 import glob
+import tokenize
 import textwrap
 
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
 from restiro.models import Resources
-from restiro.constants import docstring_block_regex
+from restiro.constants import docstring_block_regex, api_string_prefix_regex
+from restiro.parser.cache import ParseCache
 from restiro.parser.resource import DocstringApiResource
 from restiro.parser.definition import DocstringApiDefinition
 
 
 class DocstringParser:
+    cache: ParseCache = None
+    extractor: str = 'regex'
 
     def parse_docstring(self, docstring, filename, start_line):
         raise NotImplementedError
 
-    def load_from_path(self, base_path: str = '.'):
-        """ Load python files  """
-        for filename in glob.iglob('%s/**/*.py' % base_path, recursive=True):
+    def load_from_path(self, base_path: str = '.', jobs: int = None):
+        """
+        Load python files
+
+        :param base_path:
+        :param jobs: Number of worker processes to read and scan files with,
+                     results are parsed in file order anyway
+        """
+        filenames = glob.iglob('%s/**/*.py' % base_path, recursive=True)
+        if jobs is not None and jobs > 1:
+            self.load_files_parallel(list(filenames), jobs)
+            return
+
+        for filename in filenames:
             self.load_file(filename)
 
+    def load_files_parallel(self, filenames: list, jobs: int):
+        """ Scan files in a process pool and parse them in the given order """
+        blocks_by_file = {}
+        if self.cache is not None:
+            for filename in filenames:
+                blocks = self.cache.lookup(filename)
+                if blocks is not None:
+                    blocks_by_file[filename] = blocks
+
+        pending = [f for f in filenames if f not in blocks_by_file]
+        if pending:
+            with ProcessPoolExecutor(jobs) as executor:
+                scanned = executor.map(
+                    scan_file,
+                    pending,
+                    repeat(self.extractor),
+                    chunksize=max(1, len(pending) // (jobs * 4))
+                )
+                for filename, (signature, digest, blocks) in \
+                        zip(pending, scanned):
+                    blocks_by_file[filename] = blocks
+                    if self.cache is not None:
+                        self.cache.store(filename, signature, digest, blocks)
+
+        for filename in filenames:
+            for docstring, start_line in blocks_by_file[filename]:
+                self.parse_docstring(docstring, filename, start_line)
+
     def load_file(self, filename: str):
         """ Open python file and parse docstrings """
+        for docstring_block in self.read_docstring_blocks(filename):
+            self.parse_docstring(docstring_block[0], filename,
+                                 docstring_block[1])
+
+    def read_docstring_blocks(self, filename: str):
+        """ Get docstring blocks of python file, through cache if any """
+        find_blocks = docstring_extractors[self.extractor]
+        if self.cache is not None:
+            return self.cache.get_blocks(filename, find_blocks)
+
         with open(filename, 'r') as f:
-            source = f.read()
-            docstring_blocks = self.find_docstring_blocks(source)
-            for docstring_block in docstring_blocks:
-                self.parse_docstring(docstring_block[0], filename,
-                                     docstring_block[1])
+            return find_blocks(f.read())
 
     @staticmethod
     def find_docstring_blocks(source):
         """ Find docstring blocks from python source
             and return them with line number"""
 
-        re_newline = re.compile(r'\n')
         all_doc_blocks = []
+        # Matches are ordered, so newlines are counted incrementally from
+        # the previous match instead of from the beginning of the source
+        start_line, offset = 1, 0
         for line in re.finditer(docstring_block_regex, source):
-            start_line = len(re_newline.findall(source, 0, line.start())) + 1
+            start_line += source.count('\n', offset, line.start())
+            offset = line.start()
             all_doc_blocks.append((
                 textwrap.dedent(line.group()[3:-3]).lstrip(),
                 start_line))
 
         return all_doc_blocks
 
+    @staticmethod
+    def find_api_docstring_blocks(source):
+        """ Find api docstring blocks from python source using tokenizer,
+            other strings are skipped without being copied or dedented"""
+
+        if '@api' not in source:
+            return []
+
+        all_doc_blocks = []
+        readline = io.StringIO(source).readline
+        try:
+            for token in tokenize.generate_tokens(readline):
+                if token.type != tokenize.STRING:
+                    continue
+
+                prefix_match = api_string_prefix_regex.match(token.string)
+                if prefix_match is None:
+                    continue
+
+                all_doc_blocks.append((
+                    textwrap.dedent(
+                        token.string[prefix_match.end(1):-3]
+                    ).lstrip(),
+                    token.start[0]))
+
+        except (tokenize.TokenError, SyntaxError):
+            # Not a valid python source, fallback to the plain scanner
+            return [
+                block
+                for block in DocstringParser.find_docstring_blocks(source)
+                if block[0].startswith('@api')
+            ]
+
+        return all_doc_blocks
+
+
+docstring_extractors = {
+    'regex': DocstringParser.find_docstring_blocks,
+    'tokenize': DocstringParser.find_api_docstring_blocks
+}
+
+
+def scan_file(filename: str, extractor: str = 'regex'):
+    """
+    Read a python file and extract its api docstring blocks, used by worker
+    processes so the result is kept picklable.
+
+    :return: ``(signature, digest, blocks)`` as stored by :class:`ParseCache`
+    """
+    signature = ParseCache.signature(filename)
+    with open(filename, 'r') as f:
+        source = f.read()
+
+    blocks = [
+        block for block in docstring_extractors[extractor](source)
+        if block[0].startswith('@api')
+    ]
+    return signature, ParseCache.digest(source), blocks
+
 
 class DocstringResourceParser(DocstringParser):
 
@@ -75,3 +190,32 @@ class DocstringDefinitionParser(DocstringParser):
         if docstring.startswith('@apiDefine '):
             definition = DocstringApiDefinition(docstring)
             self.definitions[definition.name] = definition
+
+
+class DocstringProjectParser(DocstringParser):
+    """
+    Single pass parser, reads every file once and buckets definitions and
+    resources, ``@apiUse`` references are resolved after the walk.
+    """
+
+    def __init__(self):
+        self.definition_parser = DocstringDefinitionParser()
+        self.resource_blocks = []
+
+    @property
+    def definitions(self) -> dict:
+        return self.definition_parser.definitions
+
+    def parse_docstring(self, docstring, filename, start_line):
+        if docstring.startswith('@apiDefine '):
+            self.definition_parser.parse_docstring(docstring, filename,
+                                                   start_line)
+
+        elif docstring.startswith('@api '):
+            self.resource_blocks.append((docstring, filename, start_line))
+
+    def export_to_model(self) -> Resources:
+        resource_parser = DocstringResourceParser(self.definitions)
+        for docstring, filename, start_line in self.resource_blocks:
+            resource_parser.parse_docstring(docstring, filename, start_line)
+        return resource_parser.export_to_model()
@@ -3,12 +3,16 @@ from restiro.constants import (
     within_brackets_regex,
     within_parentheses_regex,
     single_word_regex,
-    path_regex
+    path_regex,
+    directive_regex,
+    api_line_regex,
+    param_line_regex
 )
 
 from restiro.models import (
     FormParam, QueryParam, HeaderParam, URLParam, Resource
 )
+from restiro.parser.definition import DocstringApiDefinition
 
 from restiro.exceptions import (
     MissedParameter,
@@ -25,6 +29,19 @@ params_map = {
 
 
 class DocstringApiResource:
+    # Directive name -> (handler method name, extra arguments)
+    directives = {
+        '@api': ('parse_api', ()),
+        '@apiVersion': ('parse_version', ()),
+        '@apiGroup': ('parse_group', ()),
+        '@apiPermission': ('parse_permission', ()),
+        '@apiDescription': ('parse_description', ()),
+        '@apiParam': ('parse_param', ('form',)),
+        '@apiQueryParam': ('parse_param', ('query',)),
+        '@apiUrlParam': ('parse_param', ('url',)),
+        '@apiHeadParam': ('parse_param', ('head',)),
+        '@apiUse': ('parse_use', ())
+    }
 
     def __init__(self, docstring, filename, start_line,
                  definitions: dict = None):
@@ -40,7 +57,7 @@ class DocstringApiResource:
         self.filename = filename
         self.start_line = start_line + 1
 
-        prepared_lines = []
+        self.prepared_lines = prepared_lines = []
         for index, line in enumerate(docstring.split('\n')):
             # Join lines
             if line[:1] != '@':
@@ -49,57 +66,91 @@ class DocstringApiResource:
             else:
                 prepared_lines.append([line, index])
 
+        directives = self.directives
         for line, line_number in prepared_lines:
-            if line.startswith('@api '):
-                if self.parse_api(line, line_number + self.start_line):
-                    self.title = self.title.strip()
-
-            elif line.startswith('@apiVersion '):
-                self.parse_version(line)
-                self.version = self.version.strip()
-
-            elif line.startswith('@apiGroup '):
-                self.parse_group(line)
-                self.group = self.group.strip()
-
-            elif line.startswith('@apiPermission '):
-                self.parse_permission(line)
-
-            elif line.startswith('@apiDescription '):
-                self.parse_description(line, line_number + self.start_line)
-
-            elif line.startswith('@apiParam '):
-                self.parse_param(line, line_number + self.start_line, 'form')
-
-            elif line.startswith('@apiQueryParam '):
-                self.parse_param(line, line_number + self.start_line, 'query')
+            directive_match = directive_regex.match(line)
+            if directive_match is None:
+                continue
+
+            directive = directives.get(directive_match.group(1))
+            if directive is None:
+                continue
+
+            handler_name, args = directive
+            getattr(self, handler_name)(
+                line, line_number + self.start_line, *args)
+
+    @classmethod
+    def register_directive(cls, directive: str, handler_name: str, *args):
+        """
+        Register a docstring directive handler
+
+        :param directive: Directive name, e.g. ``@apiSuccess``
+        :param handler_name: Name of the method called with the line,
+                             its absolute line number and ``args``
+        """
+        if 'directives' not in cls.__dict__:
+            cls.directives = dict(cls.directives)
+        cls.directives[directive] = (handler_name, args)
+
+    def parse_use(self, line: str, index: int):
+        for definition_line in self.parse_use_define(line, index):
+            self.prepared_lines.append(
+                [definition_line, index - self.start_line])
+
+    def parse_use_define(self, line: str, index, using: tuple = ()):
+        return self._use_definition(line, index, using)[0]
+
+    def expand_definition(self, definition: DocstringApiDefinition,
+                          index: int, using: tuple = ()):
+        """
+        Get directive lines of a definition with nested ``@apiUse``
+        expanded. The result is memoized on the definition only when it's
+        complete. An expansion cut by a missing or recursive ``@apiUse``
+        is done again, and warned about, on each use.
+
+        :param definition:
+        :param index: Line number of the ``@apiUse``, for warnings
+        :param using: Names of the definitions being expanded
+        """
+        return self._expand_definition(definition, index, using)[0]
+
+    def _use_definition(self, line: str, index, using: tuple):
+        name_match, name = self._get_name(line)
+        definition = self.definitions.get(name) if self.definitions else None
+        if definition is None:
+            warn_explicit('There is not such apiDefine %s' % name,
+                          InvalidDefinition, self.filename, index)
+            return [], False
 
-            elif line.startswith('@apiUrlParam '):
-                self.parse_param(line, line_number + self.start_line, 'url')
+        return self._expand_definition(definition, index, using)
 
-            elif line.startswith('@apiHeadParam '):
-                self.parse_param(line, line_number + self.start_line, 'head')
+    def _expand_definition(self, definition: DocstringApiDefinition,
+                           index: int, using: tuple):
+        """ :return: Lines and whether the expansion is complete """
+        if definition.expanded_lines is not None:
+            return definition.expanded_lines, True
 
-            elif line.startswith('@apiUse '):
-                new_lines = self.parse_use_define(
-                    line, line_number+self.start_line)
-                for lines in new_lines:
-                    prepared_lines.append([lines, line_number])
+        if definition.name in using:
+            warn_explicit('Recursive apiUse of %s' % definition.name,
+                          InvalidDefinition, self.filename, index)
+            return [], False
 
-    def parse_use_define(self, line: str, index):
-        name_match, name = self._get_name(line)
-        name = name.strip()
+        using += (definition.name, )
         definition_lines = []
-        is_found = None
-        for key, define in self.definitions.items():
-            if key == name:
-                definition_lines = str(define.content).split('\n')
-                is_found = True
-        if not is_found:
-            warn_explicit('There is not such apiDefine %s' % name,
-                          InvalidDefinition, self.filename, index)
+        complete = True
+        for line in definition.lines:
+            if line.startswith('@apiUse '):
+                nested_lines, nested_complete = \
+                    self._use_definition(line, index, using)
+                definition_lines.extend(nested_lines)
+                complete = complete and nested_complete
+            else:
+                definition_lines.append(line)
 
-        return definition_lines
+        if complete:
+            definition.expanded_lines = definition_lines
+        return definition_lines, complete
 
     @staticmethod
     def _get_type(line: str):
@@ -146,6 +197,13 @@ class DocstringApiResource:
         return path_match, path
 
     def parse_api(self, line: str, index: int):
+        line_match = api_line_regex.fullmatch(line)
+        if line_match is not None:
+            self.method = line_match.group('type')
+            self.path = line_match.group('path')
+            self.title = line_match.group('title').strip()
+            return True
+
         type_match, type_ = self._get_type(line)
         if type_match is None:
             warn_explicit('Missed api name',
@@ -165,19 +223,34 @@ class DocstringApiResource:
         self.title = line[max(type_match_span[1], path_match_span[1]):].strip()
         return True
 
-    def parse_permission(self, line: str):
+    def parse_permission(self, line: str, index: int = None):
         permissions = line.replace('@apiPermission ', '')
         permissions = permissions.split(',')
         for permission in permissions:
             self.permissions.append(permission.strip())
 
-    def parse_group(self, line: str):
-        self.group = line.replace('@apiGroup ', '')
+    def parse_group(self, line: str, index: int = None):
+        self.group = line.replace('@apiGroup ', '').strip()
 
-    def parse_version(self, line: str):
-        self.version = line.replace('@apiVersion ', '')
+    def parse_version(self, line: str, index: int = None):
+        self.version = line.replace('@apiVersion ', '').strip()
 
     def parse_param(self, line: str, index: int, param_type: str):
+        line_match = param_line_regex.fullmatch(line)
+        if line_match is not None:
+            name = line_match.group('name')
+            optional = name.startswith('[')
+            self.params.append({
+                'name': name[1:-1] if optional else name,
+                'group': line_match.group('group'),
+                'type': line_match.group('type'),
+                'default': None,
+                'description': line_match.group('description'),
+                'optional': optional,
+                'param_type': param_type
+            })
+            return True
+
         group_match, group = self._get_group(line)
         type_match, type_ = self._get_type(line)
         name_match, name = self._get_name(line)
@@ -261,5 +334,7 @@ class DocstringApiResource:
             display_name=self.title,
             description=self.description,
             security={'roles': self.permissions},
-            params=params_in_model
+            params=params_in_model,
+            filename=self.filename,
+            start_line=self.start_line
         )
@@ -97,6 +97,27 @@ def mockup_documents():
     ]
 
 
+def mockup_example(path, method='get', status=200, body='', headers=None,
+                   request_headers=None, query_strings=None,
+                   request_body=None):
+    """ A recorded example, ``body`` and ``headers`` are of the response """
+    from restiro import ResourceExample, ExampleRequest, ExampleResponse
+    return ResourceExample(
+        request=ExampleRequest(
+            path=path,
+            method=method,
+            headers=request_headers,
+            query_strings=query_strings,
+            body=request_body
+        ),
+        response=ExampleResponse(
+            status=status,
+            headers=headers or {},
+            body=body
+        )
+    )
+
+
 def mockup_doc_root():
     from restiro import DocumentationRoot
     return DocumentationRoot(
@@ -0,0 +1,147 @@
+import gettext
+
+from io import BytesIO
+from os import makedirs, listdir
+from os.path import join, exists
+
+from restiro.catalog import Catalog, update_po, compile_mo, compile_locales
+from restiro.models import DocumentationRoot, Resource, QueryParam
+from restiro.tests.helpers import temp_dir
+
+
+def test_catalog():
+    docs_root = DocumentationRoot(
+        title='My App',
+        resources=[
+            Resource(
+                path='/user',
+                method='get',
+                description='Get "all" users\nSorted by name',
+                params=QueryParam(name='order', description='Sort order'),
+                filename='/src/app/user.py',
+                start_line=12
+            ),
+            Resource(
+                path='/photo',
+                method='get',
+                description='',
+                params=QueryParam(name='order', description='Sort order'),
+                filename='/src/app/photo.py',
+                start_line=3
+            )
+        ]
+    )
+    template = Catalog.from_docs_root(docs_root, base_dir='/src')
+    assert len(template) == 3
+    assert template['Sort order'].references == [
+        'app/photo.py:3', 'app/user.py:12'
+    ]
+
+    pot = template.to_po()
+    assert pot.count('msgid "Sort order"') == 1
+    assert 'msgid ""\n"Get \\"all\\" users\\n"\n"Sorted by name"' in pot
+    assert '"Content-Type: text/plain; charset=UTF-8\\n"' in pot
+
+    # Read back what was written
+    parsed = Catalog.parse(pot)
+    assert parsed.headers == template.headers
+    assert [entry.msgid for entry in parsed] == \
+        [entry.msgid for entry in template]
+    assert parsed['Sort order'].references == \
+        template['Sort order'].references
+
+    # Create and update the .po file of a locale
+    messages_dir = join(temp_dir, 'catalog', 'fa_IR', 'LC_MESSAGES')
+    makedirs(messages_dir, exist_ok=True)
+    po_file = join(messages_dir, 'restiro.po')
+    catalog = update_po(po_file, template, 'fa_IR')
+    assert ('Language', 'fa_IR') in catalog.headers
+
+    catalog['Sort order'].msgstr = 'ترتیب'
+    catalog['My App'].msgstr = 'برنامه من'
+    catalog['My App'].flags.append('fuzzy')
+    catalog.save(po_file)
+
+    del template.entries['Sort order']
+    template.add('New message')
+    catalog = update_po(po_file, template)
+    assert catalog['Sort order'].obsolete
+    assert catalog['Sort order'].msgstr == 'ترتیب'
+    assert catalog['My App'].fuzzy
+    assert catalog['New message'].msgstr == ''
+    assert Catalog.load(po_file).to_po() == catalog.to_po()
+
+    # Removed messages come back with their translation
+    template.add('Sort order')
+    catalog = update_po(po_file, template)
+    assert not catalog['Sort order'].obsolete
+    assert catalog['Sort order'].msgstr == 'ترتیب'
+
+    # Compile only when the .po file changes
+    mo_file = join(messages_dir, 'restiro.mo')
+    assert compile_mo(po_file)
+    assert not compile_mo(po_file)
+    assert compile_locales(join(temp_dir, 'catalog')) == []
+    # The digest of the source is kept in the `.mo` file
+    assert sorted(listdir(messages_dir)) == ['restiro.mo', 'restiro.po']
+
+    with open(mo_file, 'rb') as f:
+        translation = gettext.GNUTranslations(f)
+    assert translation.gettext('Sort order') == 'ترتیب'
+    # Fuzzy translations are not compiled
+    assert translation.gettext('My App') == 'My App'
+
+    catalog['My App'].flags.remove('fuzzy')
+    catalog.save(po_file)
+    assert compile_locales(join(temp_dir, 'catalog')) == [mo_file]
+    assert exists(mo_file)
+    with open(mo_file, 'rb') as f:
+        translation = gettext.GNUTranslations(f)
+    assert translation.gettext('My App') == 'برنامه من'
+
+
+def test_catalog_contexts_and_plurals():
+    source = '\n'.join((
+        'msgid ""',
+        'msgstr ""',
+        '"Content-Type: text/plain; charset=UTF-8\\n"',
+        '"Plural-Forms: nplurals=2; plural=(n != 1);\\n"',
+        '',
+        'msgctxt "menu"',
+        'msgid "Open"',
+        'msgstr "Ouvrir"',
+        '',
+        'msgid "Open"',
+        'msgstr "Ouvert"',
+        '',
+        'msgid "%d user"',
+        'msgid_plural "%d users"',
+        'msgstr[0] "%d utilisateur"',
+        'msgstr[1] ""',
+        '"%d utilisateurs"',
+        '',
+        '#~ msgctxt "old"',
+        '#~ msgid "Close"',
+        '#~ msgstr "Fermer"',
+        ''
+    ))
+    catalog = Catalog.parse(source)
+    assert len(catalog) == 4
+    assert catalog['menu\x04Open'].msgstr == 'Ouvrir'
+    assert catalog['Open'].msgstr == 'Ouvert'
+    assert catalog['%d user'].msgstr_plural == \
+        ['%d utilisateur', '%d utilisateurs']
+    assert catalog['old\x04Close'].obsolete
+    assert Catalog.parse(catalog.to_po()).to_po() == catalog.to_po()
+
+    # Kept by merges
+    catalog = catalog.merge(Catalog())
+    assert catalog['menu\x04Open'].obsolete
+    assert catalog['%d user'].msgid_plural == '%d users'
+
+    translation = gettext.GNUTranslations(
+        BytesIO(Catalog.parse(source).to_mo()))
+    assert translation.pgettext('menu', 'Open') == 'Ouvrir'
+    assert translation.gettext('Open') == 'Ouvert'
+    assert translation.ngettext('%d user', '%d users', 2) == \
+        '%d utilisateurs'
@@ -1,10 +1,12 @@
+import sys
 import pytest
 import locale as lib_locale
 
 from os import makedirs
-from os.path import join
+from os.path import join, exists
 
 from restiro import Documentor
+from restiro.catalog import Catalog
 from restiro.helpers import validate_locale_name
 from restiro.tests.helpers import stuff_dir, temp_dir
 
@@ -12,94 +14,80 @@ from restiro.tests.helpers import stuff_dir, temp_dir
 # FIXME: empty spaces and new lines are redundant
 excepted_pot = """msgid ""
 msgstr ""
+"Project-Id-Version: Online Store\\n"
+"MIME-Version: 1.0\\n"
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Content-Transfer-Encoding: 8bit\\n"
 
+#: product.py:53
 msgid ""
+"\\n"
+"Delete a product with product ID, but actually its \\n"
+"                marked as deleted. \\n"
+" \\n"
+"                After review the product can delete permanently. \\n"
+" \\n"
+"                List of products cannot delete: \\n"
+"                - Products purchased on time \\n"
+"                - Products related to a `seller` \\n"
 msgstr ""
 
-msgid ""
-msgstr ""
-
-msgid ""
-msgstr ""
-
-msgid "
-Delete a product with product ID, but actually its 
-                marked as deleted. 
- 
-                After review the product can delete permanently. 
- 
-                List of products cannot delete: 
-                - Products purchased on time 
-                - Products related to a `seller` 
-"
-msgstr ""
-
-msgid " 
-"
-msgstr ""
-
-msgid " 
-"
-msgstr ""
-
-msgid " 
-"
-msgstr ""
-
-msgid " 
-"
-msgstr ""
-
-msgid " 
-"
+#: product.py:16
+#: product.py:28
+#: product.py:38
+#: seller.py:7
+#: seller.py:24
+#: seller.py:40
+msgid " \\n"
 msgstr ""
 
-msgid " 
-"
-msgstr ""
-
-msgid " Access Token 
-"
+#: product.py:53
+msgid " Access Token \\n"
 msgstr ""
 
+#: product.py:38
 msgid " Can purchase this product"
 msgstr ""
 
-msgid " Product ID 
-"
+#: product.py:53
+msgid " Product ID \\n"
 msgstr ""
 
+#: product.py:38
 msgid " Product Model "
 msgstr ""
 
-msgid " When product manufactured 
-"
+#: product.py:38
+msgid " When product manufactured \\n"
 msgstr ""
 
+#: product.py:53
 msgid "Delete a product"
 msgstr ""
 
+#: seller.py:40
 msgid "Delete a seller"
 msgstr ""
 
+#: product.py:28
+#: seller.py:24
 msgid "Get a seller"
 msgstr ""
 
-msgid "Get a seller"
-msgstr ""
-
+#: product.py:16
 msgid "Get all products"
 msgstr ""
 
+#: seller.py:7
 msgid "Get sellers list"
 msgstr ""
 
 msgid "Online Store"
 msgstr ""
 
+#: product.py:38
 msgid "Update a product"
 msgstr ""
-
 """
 
 
@@ -150,6 +138,22 @@ def test_documentor():
     with pytest.raises(lib_locale.Error):
         documentor.generate(destination_dir, locales_dir, 'un_kn')
 
+    # Parse once, render many locales
+    output_dirs = documentor.generate_locales(
+        destination_dir, locales_dir, ['en_US', 'fa_IR'])
+    assert output_dirs == [
+        join(destination_dir, 'en_US'), join(destination_dir, 'fa_IR')
+    ]
+    # Translations are memoized per build and locale
+    stats = documentor.translation_stats
+    assert list(stats) == ['en_US', 'fa_IR']
+    assert stats['en_US'][1] > 0
+    assert documentor.generate_locales(
+        destination_dir, locales_dir, ['en_US', 'fa_IR'], processes=2
+    ) == output_dirs
+    assert documentor.translation_stats == stats
+    assert exists(join(destination_dir, 'fa_IR', 'product-get.md'))
+
     # Extract translations template file
     documentor.generate_gettext(temp_dir)
 
@@ -157,6 +161,18 @@ def test_documentor():
         pot_source = ''.join(f.readlines())
         assert pot_source == excepted_pot
 
+    # Update catalogs of locales, then they are compiled on generate
+    documentor.generate_gettext(temp_dir, locales_dir, ['fa_IR'])
+    po_file = join(locales_dir, 'fa_IR', 'LC_MESSAGES', 'restiro.po')
+    catalog = Catalog.load(po_file)
+    assert 'Get all products' in catalog
+    catalog['Get all products'].msgstr = 'Get all goods'
+    catalog.save(po_file)
+
+    documentor.generate(destination_dir, locales_dir, 'fa_IR')
+    with open(join(destination_dir, 'product-get.md'), 'r') as f:
+        assert 'Get all goods' in f.read()
+
 
 def test_validate_locale_name():
     assert validate_locale_name('en_US')
@@ -164,3 +180,52 @@ def test_validate_locale_name():
     assert not validate_locale_name('gsw-FR')
     assert not validate_locale_name('111')
     assert not validate_locale_name('00_00')
+
+
+def test_generator_detection():
+    from restiro.generators import (
+        JSONGenerator, MarkdownGenerator, ShardedJSONGenerator
+    )
+
+    def get_generator(generator_type):
+        return Documentor(
+            title='Online Store',
+            source_dir=stuff_dir,
+            generator_type=generator_type
+        ).generator
+
+    assert get_generator('markdown') is MarkdownGenerator
+    assert get_generator('json') is JSONGenerator
+    # Imports `JSONGenerator`, which comes first by name
+    assert get_generator('json_sharded') is ShardedJSONGenerator
+
+
+def test_plugin_generator_detection(monkeypatch):
+    # A plugin package re-exporting its generator from a submodule
+    package_dir = join(temp_dir, 'plugins', 'restiro_fake')
+    makedirs(package_dir, exist_ok=True)
+    with open(join(package_dir, '__init__.py'), 'w') as init_file:
+        init_file.write(
+            'from restiro.generators import JSONGenerator\n'
+            'from .generator import FakeGenerator\n'
+        )
+    with open(join(package_dir, 'generator.py'), 'w') as generator_file:
+        generator_file.write(
+            'from restiro.generators import BaseGenerator\n\n\n'
+            'class FakeGenerator(BaseGenerator):\n'
+            '    pass\n'
+        )
+
+    monkeypatch.syspath_prepend(join(temp_dir, 'plugins'))
+    try:
+        generator = Documentor(
+            title='Online Store',
+            source_dir=stuff_dir,
+            generator_type='fake'
+        ).generator
+    finally:
+        sys.modules.pop('restiro_fake', None)
+        sys.modules.pop('restiro_fake.generator', None)
+
+    assert generator.__name__ == 'FakeGenerator'
+    assert generator.__module__ == 'restiro_fake.generator'
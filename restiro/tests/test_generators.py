@@ -1,9 +1,17 @@
+import json
+
 import pytest
 
-from os import makedirs
-from os.path import join
+from os import makedirs, listdir
+from os.path import join, exists
 
-from restiro.generators import BaseGenerator, MarkdownGenerator, JSONGenerator
+from restiro import (
+    ResourceExample, ExampleRequest, ExampleResponse, Resource,
+    DocumentationRoot
+)
+from restiro.generators import (
+    BaseGenerator, MarkdownGenerator, JSONGenerator, ShardedJSONGenerator
+)
 from restiro.tests.helpers import mockup_doc_root, temp_dir
 
 
@@ -24,9 +32,26 @@ def test_base_provider(docs_root):
         docs_root=docs_root,
         destination_dir=get_destination_dir('base')
     )
-    provider._ensure_file('index.txt')
-    # already used that file, so returned file_stream is in `append` mode.
-    provider._ensure_file('index.txt')
+    with provider._ensure_file('index.txt') as f:
+        f.write('first\n')
+    # already used that file, so the content is appended.
+    with provider._ensure_file('index.txt') as f:
+        f.write('second\n')
+
+    with open(join(provider.destination_dir, 'index.txt')) as f:
+        assert f.read() == 'first\nsecond\n'
+
+    # Written files are not shared between generators
+    another_provider = BaseGenerator(
+        docs_root=docs_root,
+        destination_dir=provider.destination_dir
+    )
+    assert not another_provider._files
+    with another_provider._ensure_file('index.txt') as f:
+        f.write('third\n')
+
+    with open(join(provider.destination_dir, 'index.txt')) as f:
+        assert f.read() == 'third\n'
 
 
 def test_markdown_provider(docs_root):
@@ -43,3 +68,155 @@ def test_json_provider(docs_root):
         destination_dir=get_destination_dir('json')
     )
     provider.generate()
+
+
+def test_incremental_generate():
+    docs_root = mockup_doc_root()
+    destination_dir = get_destination_dir('incremental')
+
+    def generate():
+        return MarkdownGenerator(
+            docs_root=docs_root,
+            destination_dir=destination_dir,
+            incremental=True
+        ).generate()
+
+    summary = generate()
+    assert summary.created == sorted(summary.created)
+    assert 'index.md' in summary.created
+    assert 'photo-get.md' in summary.created
+    assert not summary.updated and not summary.deleted
+
+    # A hand-written file is kept
+    with open(join(destination_dir, 'README'), 'w') as f:
+        f.write('Not generated')
+
+    summary = generate()
+    assert summary.changed == []
+    assert len(summary.unchanged) == len(listdir(destination_dir)) - 2
+
+    docs_root.resources.find('/photo', 'get').description = 'Photos'
+    docs_root.resources.pop(
+        docs_root.resources.find('/user', 'post').__key__)
+    summary = generate()
+    assert summary.updated == ['index.md', 'photo-get.md']
+    assert summary.deleted == ['user-post.md']
+    assert summary.changed == ['index.md', 'photo-get.md', 'user-post.md']
+    assert not exists(join(destination_dir, 'user-post.md'))
+    assert exists(join(destination_dir, 'README'))
+    with open(join(destination_dir, 'photo-get.md')) as f:
+        assert 'Photos' in f.read()
+
+
+def test_parallel_generate(docs_root):
+    def read_outputs(destination_dir):
+        result = {}
+        for filename in listdir(destination_dir):
+            with open(join(destination_dir, filename), 'rb') as f:
+                result[filename] = f.read()
+        return result
+
+    serial_dir = get_destination_dir('serial')
+    MarkdownGenerator(
+        docs_root=docs_root,
+        destination_dir=serial_dir
+    ).generate()
+
+    parallel_dir = get_destination_dir('parallel')
+    MarkdownGenerator(
+        docs_root=docs_root,
+        destination_dir=parallel_dir,
+        processes=2
+    ).generate()
+
+    assert read_outputs(parallel_dir) == read_outputs(serial_dir)
+
+
+def test_json_streaming():
+    docs_root = mockup_doc_root()
+    resource = docs_root.resources.find('/photo', 'get')
+    resource.examples.append(ResourceExample(
+        request=ExampleRequest(
+            path='/photo',
+            method='get',
+            headers={'Content-Type': 'application/json'},
+            query_strings={'order': 'date'},
+            body='GET /photo HTTP/1.1\r\n\r\n{"title": "\u0639\u06a9\u0633"}'
+        ),
+        response=ExampleResponse(
+            status=200,
+            headers={'Content-Type': 'application/json'},
+            body=[{'id': 1, 'title': '\u0639\u06a9\u0633', 'ratio': 1.5}]
+        )
+    ))
+
+    for incremental in (False, True):
+        destination_dir = get_destination_dir(
+            'json_streaming_%s' % incremental)
+        JSONGenerator(
+            docs_root=docs_root,
+            destination_dir=destination_dir,
+            incremental=incremental
+        ).generate()
+
+        with open(join(destination_dir, 'index.json')) as f:
+            assert f.read() == json.dumps(docs_root.to_dict())
+
+    # An unchanged streamed file is left untouched
+    summary = JSONGenerator(
+        docs_root=docs_root,
+        destination_dir=destination_dir,
+        incremental=True
+    ).generate()
+    assert summary.unchanged == ['index.json']
+    assert sorted(listdir(destination_dir)) == [
+        '.restiro-manifest.json', 'index.json'
+    ]
+
+    # Examples are rendered in markdown too
+    destination_dir = get_destination_dir('markdown_examples')
+    MarkdownGenerator(
+        docs_root=docs_root,
+        destination_dir=destination_dir
+    ).generate()
+    with open(join(destination_dir, 'photo-get.md')) as f:
+        assert '```json\n[\n    {\n        "id": 1,' in f.read()
+
+
+def test_sharded_json_provider(docs_root):
+    destination_dir = get_destination_dir('json_sharded')
+    ShardedJSONGenerator(
+        docs_root=docs_root,
+        destination_dir=destination_dir
+    ).generate()
+
+    with open(join(destination_dir, 'index.json')) as f:
+        index = json.load(f)
+
+    assert index['title'] == docs_root.title
+    assert index['documents'] == [
+        {'title': 'HeaderOne', 'file': 'documents/header-one.json'}
+    ]
+    assert len(index['resources']) == len(docs_root.resources)
+    for summary in index['resources']:
+        resource = docs_root.resources.find(summary['path'], summary['method'])
+        assert summary['display_name'] == resource.display_name
+        with open(join(destination_dir, summary['file'])) as f:
+            assert json.load(f) == json.loads(json.dumps(resource.to_dict()))
+
+    with open(join(destination_dir, 'documents', 'header-one.json')) as f:
+        assert json.load(f) == docs_root.documents[0].to_dict()
+
+    # Resources of the same filename get their own files
+    resources = [
+        Resource(path='/a-b', method='get'),
+        Resource(path='/a/b', method='get')
+    ]
+    destination_dir = get_destination_dir('json_sharded_conflict')
+    ShardedJSONGenerator(
+        docs_root=DocumentationRoot(title='Conflict', resources=resources),
+        destination_dir=destination_dir
+    ).generate()
+    assert sorted(listdir(join(destination_dir, 'resources'))) == [
+        'a-b-get-2.json', 'a-b-get.json'
+    ]
@@ -1,11 +1,21 @@
 import pytest
 
-from os.path import join
+from functools import partial
+from os import scandir, stat, listdir
+from os.path import join, isdir
+from shutil import rmtree
+from uuid import uuid4
 
 from webtest.debugapp import debug_app
 
 from restiro import DocumentationRoot, clean_examples_dir
-from restiro.tests.helpers import package_dir, mockup_resources
+from restiro.models.example_store import ExampleLog, iter_examples
+from restiro.tests.helpers import (
+    package_dir,
+    temp_dir,
+    mockup_resources,
+    mockup_example
+)
 
 examples_dir = join(package_dir, 'examples')
 
@@ -76,3 +86,311 @@ def test_webtest_middleware():
 
     resource = docs_root.resources.find(path='/user/1', method='get')
     assert resource.__str__() == 'GET /user/:user_id'
+
+
+def test_example_log():
+    from restiro.middlewares.webtest import TestApp
+
+    log_examples_dir = join(temp_dir, 'example_log')
+    test_app = TestApp(app=debug_app, examples_dir=log_examples_dir,
+                       examples_shard='gw0')
+    other_test_app = TestApp(app=debug_app, examples_dir=log_examples_dir,
+                             examples_shard='gw0')
+    for app, path in ((test_app, '/user'), (other_test_app, '/user/1'),
+                      (test_app, '/user/1/image')):
+        app.doc = True
+        app.get(path)
+
+    # Test apps of a process share the log
+    log_files = [e.path for e in scandir(log_examples_dir)]
+    assert len(log_files) == 1
+    assert '-gw0-' in log_files[0]
+
+    # Legacy examples (a pickle file per example) are still readable
+    mockup_example('/photo').dump(
+        join(log_examples_dir, '1-%s.pickle' % uuid4().hex))
+
+    # An interrupted session leaves a partial record behind
+    with open(log_files[0], 'ab') as f:
+        f.write(b'\x00\x00\x01')
+
+    assert [
+        example.request.path for example in iter_examples(log_examples_dir)
+    ] == ['/photo', '/user', '/user/1', '/user/1/image']
+
+    docs_root = DocumentationRoot(title='Hello World')
+    docs_root.set_resources(*mockup_resources())
+    docs_root.load_resource_examples(log_examples_dir)
+    assert len(docs_root.resources.find('/user/1', 'get').examples) == 1
+    assert len(docs_root.resources.find('/photo', 'get').examples) == 1
+
+    # Cleaning the examples directory starts a new log
+    rmtree(log_examples_dir)
+    test_app.doc = True
+    test_app.get('/user')
+    assert [
+        example.request.path for example in iter_examples(log_examples_dir)
+    ] == ['/user']
+
+
+def test_lazy_bodies():
+    import pickle
+
+    lazy_examples_dir = join(temp_dir, 'lazy_bodies')
+    body = '{"items": "%s", "title": "\u0639\u06a9\u0633"}' % ('x' * 100000)
+    with ExampleLog.create(lazy_examples_dir) as log:
+        example = mockup_example(
+            '/photo',
+            method='post',
+            request_headers={'Content-Type': 'application/json'},
+            request_body='POST /photo HTTP/1.1\r\n\r\n{}',
+            headers={'Content-Type': 'application/json'},
+            body=body
+        )
+        log.append(example)
+        log.append(mockup_example('/file', body=b'\x00\xff'))
+    # The appended example is kept intact
+    assert example.response.body == body
+
+    examples = list(iter_examples(lazy_examples_dir))
+    response = examples[0].response
+    assert not response.body_loaded
+    assert response.headers == {'content-type': 'application/json'}
+    assert response.body == body
+    assert examples[0].request.body_text == '{}'
+    assert examples[1].request.body is None
+    assert examples[1].response.body == b'\x00\xff'
+    assert examples[0].to_dict() == example.to_dict()
+
+    # Bodies are loaded into pickles
+    loaded_response = pickle.loads(pickle.dumps(response))
+    assert loaded_response.body_loaded
+    assert loaded_response.body == body
+
+
+def test_lazy_body_reads(monkeypatch):
+    from restiro.generators.markdown import MarkdownRepresentations
+    from restiro.models.example import LazyBody
+
+    reads_examples_dir = join(temp_dir, 'lazy_body_reads')
+    with ExampleLog.create(reads_examples_dir) as log:
+        for body in ('{"title": "Photo"}', '{"title": '):
+            log.append(mockup_example(
+                '/photo',
+                method='post',
+                request_headers={'Content-Type': 'application/json'},
+                request_body='POST /photo HTTP/1.1\r\n\r\n%s' % body,
+                headers={'Content-Type': 'application/json'},
+                body=body
+            ))
+
+    reads = []
+    read = LazyBody.read
+    monkeypatch.setattr(
+        LazyBody, 'read', lambda self, size=None: reads.append(1) or
+        read(self, size)
+    )
+
+    # Each body is read once per render, valid JSON or not
+    for example in iter_examples(reads_examples_dir):
+        del reads[:]
+        MarkdownRepresentations._repr_response_body(example.response)
+        assert len(reads) == 1
+        MarkdownRepresentations._repr_request_body(example.request)
+        assert len(reads) == 2
+
+
+def test_many_logs(monkeypatch):
+    monkeypatch.setattr(
+        'restiro.models.example_store.max_open_logs', 2)
+    many_logs_dir = join(temp_dir, 'many_logs')
+    logs = [ExampleLog.create(many_logs_dir, shard='gw%d' % index)
+            for index in range(5)]
+    for index in range(20):
+        logs[index % 5].append(
+            mockup_example('/user/%d' % index, body='user %d' % index),
+            test_id='test_%02d' % index
+        )
+    for log in logs:
+        log.close()
+
+    def count_open_files():
+        return len(listdir('/proc/self/fd')) if isdir('/proc/self/fd') \
+            else 0
+
+    open_files = count_open_files()
+    examples = list(iter_examples(many_logs_dir))
+    # Logs are closed, bodies are read on access
+    assert count_open_files() == open_files
+    assert [e.response.body for e in examples] == \
+        ['user %d' % index for index in range(20)]
+
+
+def test_interned_blobs():
+    interned_examples_dir = join(temp_dir, 'interned_blobs')
+    error = '{"message": "Not Found", "description": "%s"}' % ('x' * 100000)
+
+    not_found = partial(
+        mockup_example,
+        status=404,
+        request_headers={'Accept': 'application/json'},
+        headers={'Content-Type': 'application/json'},
+        body=error
+    )
+
+    with ExampleLog.create(interned_examples_dir, shard='gw0') as log:
+        for index in range(50):
+            log.append(not_found('/user/%d' % index))
+        log.append(not_found('/photo', body=b'\x00\xff'))
+    # Bodies and headers are written once
+    assert len(error) < stat(log.filename).st_size < len(error) * 2
+
+    with ExampleLog.create(interned_examples_dir, shard='gw1') as log:
+        log.append(not_found('/user/50'))
+
+    examples = list(iter_examples(interned_examples_dir))
+    assert len(examples) == 52
+    assert [e.request.path for e in examples[:50]] == \
+        ['/user/%d' % index for index in range(50)]
+    assert all(e.response.body == error for e in examples[:50])
+    assert examples[50].response.body == b'\x00\xff'
+    assert examples[0].request.headers == {'accept': 'application/json'}
+    assert examples[0].response.content_type == 'application/json'
+
+    # Bodies of a log are loaded once
+    assert examples[0].response.raw_body is examples[49].response.raw_body
+    assert examples[0].response.raw_body is not examples[51].response.raw_body
+    assert examples[51].response.body == error
+
+    # Headers are not shared
+    examples[0].request.headers['accept'] = 'text/plain'
+    assert examples[1].request.headers == {'accept': 'application/json'}
+    assert examples[51].request.headers == {'accept': 'application/json'}
+
+
+def test_example_policy():
+    from restiro import ExamplePolicy
+
+    policy_examples_dir = join(temp_dir, 'example_policy')
+
+    with ExampleLog.create(policy_examples_dir) as log:
+        for page in range(5):
+            log.append(mockup_example('/user', query_strings={'page': page}))
+        log.append(mockup_example('/user', query_strings={'page': 0}))
+        log.append(mockup_example('/user', status=404))
+        log.append(mockup_example('/user', status=404))
+        log.append(mockup_example('/photo', body='\u0639' * 100))
+        log.append(mockup_example('/photo', status=500, body='x' * 10))
+
+    def load(policy):
+        docs_root = DocumentationRoot(title='Hello World')
+        docs_root.set_resources(*mockup_resources())
+        docs_root.load_resource_examples(policy_examples_dir, policy=policy)
+        return (
+            docs_root.resources.find('/user', 'get').examples,
+            docs_root.resources.find('/photo', 'get').examples
+        )
+
+    user_examples, photo_examples = load(None)
+    assert len(user_examples) == 8
+    assert len(photo_examples) == 2
+
+    user_examples, photo_examples = load(ExamplePolicy(max_per_resource=3))
+    assert [e.request.query_strings['page'] for e in user_examples] == \
+        [0, 1, 2]
+    assert len(photo_examples) == 2
+
+    user_examples, _ = load(ExamplePolicy(max_per_status=2))
+    assert [e.response.status for e in user_examples] == [200, 200, 404, 404]
+
+    user_examples, _ = load(ExamplePolicy(dedupe=True))
+    assert [e.response.status for e in user_examples] == [200] * 5 + [404]
+
+    user_examples, _ = load(ExamplePolicy(max_per_status=1, dedupe=True))
+    assert [e.response.status for e in user_examples] == [200, 404]
+
+    # Bodies are cut by bytes, not by characters
+    _, photo_examples = load(ExamplePolicy(max_body_size=51))
+    response = photo_examples[0].response
+    assert response.body == \
+        '\u0639' * 25 + ExamplePolicy.truncation_marker % 200
+    assert photo_examples[1].response.body == 'x' * 10
+
+
+# noinspection PyProtectedMember
+def test_background_writer():
+    from restiro.middlewares.webtest import TestApp
+
+    background_examples_dir = join(temp_dir, 'background_writer')
+    test_app = TestApp(app=debug_app, examples_dir=background_examples_dir,
+                       background_writer=True)
+    paths = ['/user/%s' % i for i in range(300)]
+    for path in paths:
+        test_app.doc = True
+        test_app.get(path)
+
+    test_app.flush_examples()
+    assert [
+        example.request.path
+        for example in iter_examples(background_examples_dir)
+    ] == paths
+
+    test_app.doc = True
+    test_app.get('/user')
+    test_app._examples_log.close()
+    assert len(list(iter_examples(background_examples_dir))) == 301
+
+
+def test_sharded_examples(monkeypatch):
+    sharded_examples_dir = join(temp_dir, 'sharded_examples')
+
+    def record_run(session, assignments):
+        logs = {
+            shard: ExampleLog.create(sharded_examples_dir, shard=shard,
+                                     session=session)
+            for shard in ('gw0', 'gw1')
+        }
+        # Workers record concurrently, interleaved
+        for shard, test_id, path in assignments:
+            logs[shard].append(mockup_example(path), test_id=test_id)
+        for log in logs.values():
+            log.close()
+
+        return [e.request.path for e in iter_examples(sharded_examples_dir)]
+
+    first_run = record_run('run1', (
+        ('gw1', 'test_b.py::test_b', '/b/1'),
+        ('gw0', 'test_a.py::test_a', '/a/1'),
+        ('gw1', 'test_b.py::test_b', '/b/2'),
+        ('gw0', 'test_a.py::test_a', '/a/2'),
+    ))
+    assert first_run == ['/a/1', '/a/2', '/b/1', '/b/2']
+
+    # Next run, tests scheduled on other workers
+    monkeypatch.setattr('restiro.helpers.get_examples_dir',
+                        lambda: sharded_examples_dir)
+    monkeypatch.setenv('PYTEST_XDIST_TESTRUNUID', 'run2')
+    clean_examples_dir()
+    second_run = record_run('run2', (
+        ('gw0', 'test_b.py::test_b', '/b/1'),
+        ('gw0', 'test_b.py::test_b', '/b/2'),
+        ('gw1', 'test_a.py::test_a', '/a/1'),
+        ('gw1', 'test_a.py::test_a', '/a/2'),
+    ))
+    assert second_run == first_run
+
+    # A worker cleaning the directory keeps shards of its own run
+    clean_examples_dir()
+    assert len(list(iter_examples(sharded_examples_dir))) == 4
+
+    # Logs of a process with the same session, test and shard are merged
+    # in recording order
+    same_shard_dir = join(temp_dir, 'same_shard_examples')
+    logs = [ExampleLog.create(same_shard_dir, session='run3')
+            for _ in range(2)]
+    paths = ['/a/1', '/b/1', '/a/2', '/b/2']
+    for log, path in zip(logs * 2, paths):
+        log.append(mockup_example(path))
+    for log in logs:
+        log.close()
+    assert [e.request.path for e in iter_examples(same_shard_dir)] == paths
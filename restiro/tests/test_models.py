@@ -1,9 +1,12 @@
+import pickle
+
 import pytest
 
 from restiro.models import (
     DocumentationRoot,
     Document,
     Resource,
+    Resources,
     FormParam,
     QueryParam,
     URLParam,
@@ -209,3 +212,158 @@ def test_resource_example():
         body='Welcome'
     )
     assert response_example.body_format == BodyFormatJson
+
+
+def test_resources_find():
+    resources = Resources()
+    resources.append(Resource(path='/user/:user_id', method='get'))
+    resources.append(Resource(path='/user/me', method='get'))
+    resources.append(Resource(path='/user/:user_id/image', method='get'))
+    resources.update({
+        '/user/me/image-get': Resource(path='/user/me/image', method='get')
+    })
+
+    # Literal segments take precedence over parameters
+    assert resources.find('/user/me', 'get').path == '/user/me'
+    assert resources.find('/user/1', 'get').path == '/user/:user_id'
+    assert resources.find('/user/me/image', 'get').path == '/user/me/image'
+    assert resources.find('/user/1/image', 'get').path == \
+        '/user/:user_id/image'
+    assert resources.find('/user/1', 'post') is None
+    assert resources.find('/user/1/image/1', 'get') is None
+
+    # Index follows replacements and removals
+    resources.append(Resource(path='/user/me', method='get', tags=['me']))
+    assert resources.find('/user/me', 'get').tags == ['me']
+    del resources['/user/me-get']
+    assert resources.find('/user/me', 'get').path == '/user/:user_id'
+    resources.pop('/user/:user_id-get')
+    assert resources.find('/user/me', 'get') is None
+
+    # Every way of adding and removing items updates the index
+    resources.setdefault(
+        '/user/me-get', Resource(path='/user/me', method='get'))
+    assert resources.find('/user/me', 'get').path == '/user/me'
+    key, resource = resources.popitem()
+    assert resources.find(resource.path, 'get') is None
+    resources |= {key: resource}
+    assert resources.find(resource.path, 'get') is resource
+    merged = resources | {
+        '/photo-get': Resource(path='/photo', method='get')
+    }
+    assert isinstance(merged, Resources)
+    assert merged.find('/photo', 'get').path == '/photo'
+    assert resources.find('/photo', 'get') is None
+    merged = resources.copy()
+    merged.clear()
+    assert resources.find(resource.path, 'get') is resource
+
+    # Copies keep their own index
+    copied = pickle.loads(pickle.dumps(resources))
+    assert copied.find('/user/me/image', 'get').path == '/user/me/image'
+    copied.clear()
+    assert copied.find('/user/me/image', 'get') is None
+    assert resources.find('/user/me/image', 'get') is not None
+
+
+def test_slots():
+    from copy import copy
+
+    class LegacyPickle:
+        """ Pickles like the models did before `__slots__` """
+
+        def __init__(self, cls, state):
+            self.cls = cls
+            self.state = state
+
+        def __reduce__(self):
+            return object.__new__, (self.cls,), self.state
+
+    legacy_example = pickle.loads(pickle.dumps(LegacyPickle(
+        ResourceExample,
+        {
+            'request': LegacyPickle(ExampleRequest, {
+                'path': '/photo',
+                'method': 'get',
+                'headers': {'content-type': 'application/json'},
+                'query_strings': None,
+                'form_params': None,
+                'body': 'GET /photo HTTP/1.1\r\n\r\n{}'
+            }),
+            'response': LegacyPickle(ExampleResponse, {
+                'status': 200,
+                'headers': {'content-type': 'application/json'},
+                'body': {'id': 1},
+                'reason': 'OK'
+            })
+        }
+    )))
+    assert isinstance(legacy_example, ResourceExample)
+    assert legacy_example.request.body_text == '{}'
+    assert legacy_example.response.body == {'id': 1}
+    assert legacy_example.response.body_format is BodyFormatJson
+
+    # Models have no `__dict__`
+    param = URLParam(name='id', type_=int, description='ID')
+    resource = Resource(path='/photo/:id', method='get', params=param,
+                        examples=[legacy_example])
+    for model in (param, resource, legacy_example, legacy_example.request,
+                  legacy_example.response, Document(title='Guide')):
+        assert not hasattr(model, '__dict__')
+
+    # The state is still a dict of attributes
+    assert param.__getstate__()['name'] == 'id'
+    loaded_resource = pickle.loads(pickle.dumps(resource))
+    assert loaded_resource.to_dict() == resource.to_dict()
+    assert copy(param).to_dict() == param.to_dict()
+
+    translated = resource.translated(lambda value: value.upper())
+    assert translated.uri_params[0].description == 'ID'.upper()
+    assert resource.uri_params[0].description == 'ID'
+
+
+def test_body_format():
+    from restiro.models.example import parse_content_type, BodyFormatXml
+
+    assert parse_content_type('application/json') == (BodyFormatJson, None)
+    assert parse_content_type(
+        'Application/Problem+JSON; Charset="UTF-8"'
+    ) == (BodyFormatJson, 'utf-8')
+    assert parse_content_type('application/atom+xml')[0] is BodyFormatXml
+    assert parse_content_type('text/xml;charset=iso-8859-1') == \
+        (BodyFormatXml, 'iso-8859-1')
+    assert parse_content_type('text/html') == (None, None)
+
+    request = ExampleRequest(
+        path='/photo',
+        method='post',
+        headers={'Content-Type': 'application/vnd.api+json; charset=utf-8'},
+        body='POST /photo HTTP/1.1\r\n\r\n{"title": "photo"}'
+    )
+    assert request.body_format is BodyFormatJson
+    assert request.charset == 'utf-8'
+    assert request.body_text == '{"title": "photo"}'
+    assert request.body_text is request.body_text
+
+    # Derived values follow changes of the body and headers
+    request.body = 'POST /photo HTTP/1.1\r\n\r\n{}'
+    assert request.body_text == '{}'
+    request.headers['content-type'] = 'text/plain'
+    assert request.body_format is None
+    assert request.to_dict()['body_format'] is None
+
+    response = ExampleResponse(
+        status=200,
+        headers={'Content-Type': 'application/json'},
+        body='{"id": 1}'
+    )
+    assert response.formatted_body == '{\n    "id": 1\n}'
+    response.headers['content-type'] = 'text/plain'
+    assert response.formatted_body == '{"id": 1}'
+    response.headers['content-type'] = 'application/json'
+    response.body = 'not json'
+    assert response.formatted_body == 'not json'
+
+    # Caches are not pickled
+    assert '_cache' not in response.__getstate__()
+    assert pickle.loads(pickle.dumps(response)).formatted_body == 'not json'
@@ -1,4 +1,5 @@
 import warnings
+from os import utime
 from os.path import join
 
 from restiro import (
@@ -7,11 +8,16 @@ from restiro import (
     QueryParam,
     URLParam
 )
+from restiro.parser import ParseCache
+from restiro.parser.resource import DocstringApiResource
+from restiro.parser.definition import DocstringApiDefinition
 from restiro.parser.docstring import (
+    DocstringParser,
     DocstringResourceParser,
-    DocstringDefinitionParser
+    DocstringDefinitionParser,
+    DocstringProjectParser
 )
-from restiro.tests.helpers import stuff_dir
+from restiro.tests.helpers import stuff_dir, temp_dir
 from restiro.exceptions import (
     MissedParameter,
     InvalidDefinition,
@@ -127,3 +133,264 @@ Delete a product with product ID, but actually its
     some_warning = recwarn.pop(DuplicateApiName)
     assert some_warning is not None
     assert some_warning.lineno == 15
+
+
+def test_parse_cache():
+    online_store_path = join(stuff_dir, 'online_store')
+    cache_file = join(temp_dir, 'parse-cache', 'restiro.cache')
+
+    expected = Parser.load_from_path(online_store_path).to_dict()
+    assert Parser.load_from_path(
+        online_store_path, cache_file=cache_file).to_dict() == expected
+
+    cache = ParseCache(cache_file)
+    assert len(cache.entries) == 3
+    product_file = join(online_store_path, 'product.py')
+    cached_blocks = cache.get_blocks(product_file, None)
+    assert len(cached_blocks) == 5
+    assert all(block[0].startswith('@api') for block in cached_blocks)
+
+    # Warm build served from cache, stat changed but content did not
+    utime(product_file)
+    assert Parser.load_from_path(
+        online_store_path, cache_file=cache_file).to_dict() == expected
+
+    # Corrupted cache file is ignored
+    with open(cache_file, 'wb') as f:
+        f.write(b'corrupted')
+    assert ParseCache(cache_file).entries == {}
+
+
+def test_single_pass_parser():
+    online_store_path = join(stuff_dir, 'online_store')
+
+    definition_parser = DocstringDefinitionParser()
+    definition_parser.load_from_path(online_store_path)
+    resource_parser = DocstringResourceParser(definition_parser.definitions)
+    resource_parser.load_from_path(online_store_path)
+    expected = resource_parser.export_to_model()
+
+    loaded_files = []
+
+    class CountingParser(DocstringProjectParser):
+        def read_docstring_blocks(self, filename):
+            loaded_files.append(filename)
+            return super().read_docstring_blocks(filename)
+
+    project_parser = CountingParser()
+    project_parser.load_from_path(online_store_path)
+    resources = project_parser.export_to_model()
+
+    assert len(loaded_files) == len(set(loaded_files)) == 3
+    assert list(resources) == list(expected)
+    assert resources.to_dict() == expected.to_dict()
+    assert 'ProductGetParams' in project_parser.definitions
+
+
+def test_parallel_parser(recwarn):
+    online_store_path = join(stuff_dir, 'online_store')
+    wrong_usecases_path = join(stuff_dir, 'wrong_usecases')
+    cache_file = join(temp_dir, 'parallel-cache', 'restiro.cache')
+
+    expected = Parser.load_from_path(online_store_path)
+    resources = Parser.load_from_path(online_store_path, jobs=2)
+    assert list(resources) == list(expected)
+    assert resources.to_dict() == expected.to_dict()
+
+    # Cold and warm builds through the cache
+    for _ in range(2):
+        resources = Parser.load_from_path(
+            online_store_path, cache_file=cache_file, jobs=2)
+        assert resources.to_dict() == expected.to_dict()
+    assert len(ParseCache(cache_file).entries) == 3
+
+    # Warnings are raised in the main process, in file order
+    warnings.simplefilter('always')
+    recwarn.clear()
+    Parser.load_from_path(wrong_usecases_path)
+    serial_warnings = [(w.filename, w.lineno) for w in recwarn]
+    recwarn.clear()
+    Parser.load_from_path(wrong_usecases_path, jobs=2)
+    assert [(w.filename, w.lineno) for w in recwarn] == serial_warnings
+    assert len(serial_warnings) == 5
+
+
+def test_find_docstring_blocks_scaling():
+    def synthetic_source(count):
+        return ''.join(
+            'def handler_%s():\n'
+            '    """\n'
+            '    @api {get} /resource/%s Get resource\n'
+            '    """\n'
+            '\n' % (i, i)
+            for i in range(count)
+        )
+
+    class CountingSource(str):
+        """ Counts characters scanned for newlines """
+        scanned = 0
+
+        def count(self, sub, start=None, end=None):
+            CountingSource.scanned += \
+                (len(self) if end is None else end) - (start or 0)
+            return super().count(sub, start, end)
+
+    source = CountingSource(synthetic_source(10000))
+    blocks = DocstringParser.find_docstring_blocks(source)
+    assert len(blocks) == 10000
+    assert [block[1] for block in blocks] == list(range(2, 50000, 5))
+    assert blocks[-1][0].startswith('@api {get} /resource/9999 ')
+
+    # Linear: each character is scanned once, the former line counting
+    # scanned the source from the beginning for each docstring
+    assert CountingSource.scanned <= len(source)
+
+
+def test_tokenize_extractor():
+    online_store_path = join(stuff_dir, 'online_store')
+
+    expected = Parser.load_from_path(online_store_path)
+    resources = Parser.load_from_path(online_store_path, extractor='tokenize')
+    assert resources.to_dict() == expected.to_dict()
+
+    source = '\n'.join((
+        'QUERY = """',
+        '    SELECT * FROM product',
+        '"""',
+        '',
+        '',
+        'def get():',
+        "    '''",
+        '    @api {get} /product Get all products',
+        "    '''",
+        '    return r"""@apiGroup Raw"""',
+        ''
+    ))
+    blocks = DocstringParser.find_api_docstring_blocks(source)
+    assert blocks == [
+        ('@api {get} /product Get all products\n', 7),
+        ('@apiGroup Raw', 10)
+    ]
+
+    assert DocstringParser.find_api_docstring_blocks(QUERY_SOURCE) == []
+
+    # Not a python source, fallback to the plain scanner
+    blocks = DocstringParser.find_api_docstring_blocks(
+        'call(\n"""\n@api {get} /a A\n"""\n')
+    assert blocks == [('@api {get} /a A\n', 2)]
+
+
+QUERY_SOURCE = '''
+def get():
+    """ Get products """
+    return """
+        SELECT * FROM product -- not an @api string
+    """
+'''
+
+
+def test_directive_registry():
+    class SuccessApiResource(DocstringApiResource):
+        def __init__(self, *args, **kwargs):
+            self.success_fields = []
+            super().__init__(*args, **kwargs)
+
+        def parse_success(self, line, index):
+            self.success_fields.append((self._get_name(line)[1], index))
+
+    SuccessApiResource.register_directive('@apiSuccess', 'parse_success')
+    assert '@apiSuccess' not in DocstringApiResource.directives
+
+    resource = SuccessApiResource(
+        '@api {get} /product/:productId Get a product\n'
+        '@apiGroup Product\n'
+        '@apiUrlParam {Integer} productId Product ID\n'
+        '@apiQueryParam (filters) {String} [fields] Fields to return\n'
+        '@apiParam {String} title (Product title)\n'
+        '@apiSuccess title\n',
+        filename='product.py',
+        start_line=10,
+        definitions={}
+    )
+    assert resource.method == 'get'
+    assert resource.path == '/product/:productId'
+    assert resource.title == 'Get a product'
+    assert resource.group == 'Product'
+    assert resource.success_fields == [('title', 16)]
+    assert [
+        (p['name'], p['group'], p['type'], p['optional'], p['description'])
+        for p in resource.params
+    ] == [
+        ('productId', None, 'Integer', False, ' Product ID'),
+        ('fields', 'filters', 'String', True, ' Fields to return'),
+        # Group after the name, parsed piece by piece
+        ('title', 'Product title', 'String', False, '')
+    ]
+
+
+def test_use_definitions(recwarn):
+    definitions = {}
+    for docstring in (
+            '@apiDefine Auth\n@apiHeadParam Authorization Access token\n',
+            '@apiDefine Paging\n@apiQueryParam [take]\n@apiUse Auth\n',
+            '@apiDefine Ping\n@apiQueryParam ping\n@apiUse Pong\n',
+            '@apiDefine Pong\n@apiQueryParam pong\n@apiUse Ping\n',
+            '@apiDefine Broken\n@apiQueryParam broken\n@apiUse Missing\n'):
+        definition = DocstringApiDefinition(docstring)
+        definitions[definition.name] = definition
+
+    warnings.simplefilter('always')
+    resource = DocstringApiResource(
+        '@api {get} /product Get all products\n'
+        '@apiUse Paging\n'
+        '@apiQueryParam [sort]\n',
+        filename='product.py',
+        start_line=1,
+        definitions=definitions
+    )
+    assert [p['name'] for p in resource.params] == \
+        ['sort', 'take', 'Authorization']
+    assert definitions['Paging'].expanded_lines == [
+        '@apiQueryParam [take]', '@apiHeadParam Authorization Access token'
+    ]
+    assert len(recwarn) == 0
+
+    # Memoized definitions are shared between resources
+    resource = DocstringApiResource(
+        '@api {get} /seller Get all sellers\n@apiUse Paging\n',
+        filename='seller.py',
+        start_line=1,
+        definitions=definitions
+    )
+    assert [p['name'] for p in resource.params] == ['take', 'Authorization']
+
+    # Recursive definitions, cut expansions are not memoized and warn on
+    # each use
+    for name, expected in (('Ping', ['ping', 'pong']),
+                           ('Pong', ['pong', 'ping'])):
+        resource = DocstringApiResource(
+            '@api {get} /ping Ping\n@apiUse %s\n' % name,
+            filename='ping.py',
+            start_line=1,
+            definitions=definitions
+        )
+        assert [p['name'] for p in resource.params] == expected
+        some_warning = recwarn.pop(InvalidDefinition)
+        assert 'Recursive' in str(some_warning.message)
+        assert some_warning.lineno == 3
+    assert definitions['Ping'].expanded_lines is None
+    assert definitions['Pong'].expanded_lines is None
+
+    # Missing nested definitions
+    for path in ('/broken', '/broken-too'):
+        resource = DocstringApiResource(
+            '@api {get} %s Broken\n@apiUse Broken\n' % path,
+            filename='broken.py',
+            start_line=1,
+            definitions=definitions
+        )
+        assert [p['name'] for p in resource.params] == ['broken']
+        some_warning = recwarn.pop(InvalidDefinition)
+        assert 'Missing' in str(some_warning.message)
+    assert definitions['Broken'].expanded_lines is None
+    assert len(recwarn) == 0
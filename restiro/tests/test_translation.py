@@ -1,4 +1,5 @@
 
+from restiro.models.translation_mixin import MemoTranslator
 from restiro.models import (
     DocumentationRoot,
     Document,
@@ -54,9 +55,89 @@ def test_translations():
     )
     translations = docs_root.extract_translations()
     assert len(translations) == 6
+    assert translations == sorted(set(translations))
     assert 'My App' in translations
     assert 'HeaderOne' in translations
     assert 'This is content of HeaderOne.' in translations
     assert 'Get all users' in translations
     assert 'Get all photos' in translations
     assert 'Create a new user' in translations
+
+
+def test_translated():
+    docs_root = DocumentationRoot(
+        title='My App',
+        documents=[
+            Document(title='HeaderOne', content='Content'),
+            Document(title='Untranslated')
+        ],
+        resources=[
+            Resource(
+                path='/photo',
+                method='get',
+                description='Get all photos',
+                params=QueryParam(name='order', description='Sort order'),
+                examples=[object()]
+            ),
+            Resource(path='/user', method='get', description='Get all users')
+        ]
+    )
+    translations = {
+        'My App': 'MY APP',
+        'HeaderOne': 'HEADERONE',
+        'Get all photos': 'GET ALL PHOTOS',
+        'Sort order': 'SORT ORDER'
+    }
+    localized_docs_root = docs_root.translated(
+        lambda value: translations.get(value, value))
+
+    assert localized_docs_root.title == 'MY APP'
+    assert localized_docs_root.documents[0].title == 'HEADERONE'
+    resource = localized_docs_root.resources.find('/photo', 'get')
+    assert resource.description == 'GET ALL PHOTOS'
+    assert resource.query_params[0].description == 'SORT ORDER'
+
+    # The original tree is untouched
+    assert docs_root.title == 'My App'
+    assert docs_root.documents[0].title == 'HeaderOne'
+    original_resource = docs_root.resources.find('/photo', 'get')
+    assert original_resource.description == 'Get all photos'
+    assert original_resource.query_params[0].description == 'Sort order'
+
+    # Untranslated models and examples are shared
+    assert resource.examples is original_resource.examples
+    assert localized_docs_root.documents[1] is docs_root.documents[1]
+    assert localized_docs_root.resources.find('/user', 'get') is \
+        docs_root.resources.find('/user', 'get')
+
+
+def test_memo_translator():
+    lookups = []
+
+    def translator(value):
+        lookups.append(value)
+        return value.upper()
+
+    docs_root = DocumentationRoot(
+        title='My App',
+        resources=[
+            Resource(
+                path='/user/%s' % i,
+                method='get',
+                description='Get a user',
+                params=QueryParam(name='order', description='Sort order')
+            )
+            for i in range(10)
+        ]
+    )
+    memo = MemoTranslator(translator)
+    docs_root.translate(memo)
+
+    assert sorted(lookups) == ['Get a user', 'My App', 'Sort order']
+    assert memo.misses == 3
+    assert memo.hits == 18
+    assert memo.hit_rate == 18 / 21
+    assert all(
+        resource.description == 'GET A USER'
+        for resource in docs_root.resources.values()
+    )